@@ -1,4 +1,5 @@
 import os
+import re
 
 """Global constants shared by stage modules."""
 # Default physical tile shape (rows, cols) in pixels
@@ -7,8 +8,12 @@ DEFAULT_TILE_SHAPE = (2048, 2048)
 # Row-column filename template  (two-digit zero-padded row + col)
 ROWCOL_TEMPLATE = "manual_r{row:02d}_c{col:02d}_0_{suffix}"
 
+# Shared blank tile that padded grid cells symlink to (hidden: not a manual_* tile)
+BLANK_TILE_NAME = ".blank.tiff"
+
 # Regex used by utils to pull FOV / suffix out of any “manual_###_0_*.tiff”
 FOV_SUFFIX_RE = r"^manual_(\d+)_0_(.+\.tiff)$"
+FOV_SUFFIX_PAT = re.compile(FOV_SUFFIX_RE)
 
 DEFAULT_MIST_PARAMS = {
     "filenamePatternType": "Row-Column",
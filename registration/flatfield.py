@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 import logging
+import os
 import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 import numpy as np
@@ -19,6 +21,65 @@ CHANNELS = ["405", "488", "561", "638"]
 SUFFIX_TMPL = "Fluorescence_{ch}_nm_Ex"
 # ───────────────────────────────────────────────────────────────────────────────
 
+# per-worker gain (mean_ff / ff) and scratch buffer, installed once by the
+# pool initializer so the (H, W) float array is not re-pickled with every task
+_GAIN = None
+_BUF = None
+
+
+def _init_worker(gain):
+    global _GAIN, _BUF
+    _GAIN = gain
+    _BUF = np.empty_like(gain)
+
+
+def _correct_one(path):
+    """Flatfield-correct *path* in place with the worker's gain."""
+    raw = imread(str(path))
+    orig_dtype = raw.dtype
+
+    # raw * (mean_ff / ff) in one float32 pass into the reused buffer
+    np.multiply(raw, _GAIN, out=_BUF)
+
+    # clip in place and cast back to original integer dtype
+    info = np.iinfo(orig_dtype)
+    np.clip(_BUF, info.min, info.max, out=_BUF)
+    corr = _BUF.astype(orig_dtype)
+
+    tifffile.imwrite(str(path), corr)
+    return path.name
+
+
+def fit_channel(input_dir, ch):
+    """Fit a BaSiC flatfield for channel *ch*; returns (ch, flatfield | None)."""
+    suffix = SUFFIX_TMPL.format(ch=ch)
+    tiffs = sorted(input_dir.glob(f"*_{suffix}.tiff"))
+    if not tiffs:
+        logging.warning(f"No TIFFs for channel {ch} in {input_dir}")
+        return ch, None
+
+    random.shuffle(tiffs)
+    sample = tiffs[: min(MAX_FLATFIELD_IMAGES, len(tiffs))]
+    if len(sample) < len(tiffs):
+        logging.warning(f"Using {len(sample)}/{len(tiffs)} images for {ch}")
+
+    # load sample as float for BaSiC, decoding straight into one preallocated
+    # stack rather than a list of per-file copies plus np.stack
+    first = imread(str(sample[0]))
+    arr = np.empty((len(sample),) + first.shape, dtype=np.float32)
+    arr[0] = first
+    for i, p in enumerate(sample[1:], 1):
+        arr[i] = imread(str(p))
+    if arr.ndim not in (3, 4):
+        logging.error(f"Bad dims {arr.shape} for {ch}, skipping")
+        return ch, None
+
+    logging.info(f"Fitting BaSiC flatfield for channel {ch} (shape={arr.shape})")
+    basic = BaSiC(get_darkfield=False, smoothness_flatfield=1)
+    basic.fit(arr)
+    return ch, basic.flatfield
+
+
 def main():
     logging.basicConfig(level=logging.INFO,
                         format="%(asctime)s %(levelname)s: %(message)s")
@@ -26,54 +87,27 @@ def main():
     for input_dir in INPUT_DIRS:
         logging.info(f"=== Processing {input_dir} ===")
 
-        # 1) compute flatfields
+        # 1) compute flatfields – the channel fits are independent, run them
+        #    side by side
         flatfields = {}
-        for ch in CHANNELS:
-            suffix = SUFFIX_TMPL.format(ch=ch)
-            tiffs = sorted(input_dir.glob(f"*_{suffix}.tiff"))
-            if not tiffs:
-                logging.warning(f"No TIFFs for channel {ch} in {input_dir}")
-                continue
-
-            random.shuffle(tiffs)
-            sample = tiffs[: min(MAX_FLATFIELD_IMAGES, len(tiffs))]
-            if len(sample) < len(tiffs):
-                logging.warning(f"Using {len(sample)}/{len(tiffs)} images for {ch}")
-
-            # load sample as float for BaSiC, but remember original dtype
-            imgs = []
-            dtypes = []
-            for p in sample:
-                raw = imread(str(p))
-                dtypes.append(raw.dtype)
-                imgs.append(raw.astype(np.float32))
-            arr = np.stack(imgs, axis=0)
-            if arr.ndim not in (3, 4):
-                logging.error(f"Bad dims {arr.shape} for {ch}, skipping")
-                continue
-
-            logging.info(f"Fitting BaSiC flatfield for channel {ch} (shape={arr.shape})")
-            basic = BaSiC(get_darkfield=False, smoothness_flatfield=1)
-            basic.fit(arr)
-            flatfields[ch] = basic.flatfield
+        with ProcessPoolExecutor(max_workers=min(len(CHANNELS), os.cpu_count())) as ex:
+            futures = [ex.submit(fit_channel, input_dir, ch) for ch in CHANNELS]
+            for fut in as_completed(futures):
+                ch, ff = fut.result()
+                if ff is not None:
+                    flatfields[ch] = ff
 
         # 2) apply & overwrite every TIFF in each channel
         for ch, ff in flatfields.items():
             suffix = SUFFIX_TMPL.format(ch=ch)
-            mean_ff = ff.mean()
-            for path in sorted(input_dir.glob(f"*_{suffix}.tiff")):
-                raw = imread(str(path))
-                orig_dtype = raw.dtype
-
-                # compute correction in float
-                corr = (raw.astype(np.float32) / ff) * mean_ff
-
-                # clip and cast back to original integer dtype
-                info = np.iinfo(orig_dtype)
-                corr = np.clip(corr, info.min, info.max).astype(orig_dtype)
-
-                tifffile.imwrite(str(path), corr)
-                logging.info(f"  corrected & overwrote {path.name}")
+            gain = (ff.mean() / ff).astype(np.float32)
+            paths = sorted(input_dir.glob(f"*_{suffix}.tiff"))
+            # files are independent: decode/correct/encode them in parallel
+            with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                     initializer=_init_worker,
+                                     initargs=(gain,)) as ex:
+                for name in ex.map(_correct_one, paths, chunksize=4):
+                    logging.info(f"  corrected & overwrote {name}")
 
 if __name__ == "__main__":
     main()
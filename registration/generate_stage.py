@@ -4,22 +4,25 @@ Stage 2 – map tiles to row/column filenames, fill blank grid cells, and
 
 Public API
 ----------
-generate_stage(tile_dir: Path) -> dict[str, int | str]
+generate_stage(tile_dir: Path) -> dict[str, int | str | list[str]]
     Performs renaming/padding *in-place* and returns a dict containing:
         • filenamePattern  (row/column template for 405-nm channel)
         • gridWidth
         • gridHeight
+        • channels         (channel suffixes discovered in *tile_dir*)
 """
 
 from __future__ import annotations
 from pathlib import Path
+from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
+import io
 import os
 import numpy as np
-import pandas as pd
 import tifffile
 
-from registration.constants import ROWCOL_TEMPLATE, DEFAULT_TILE_SHAPE
-from registration.utils import discover_channels
+from registration.constants import BLANK_TILE_NAME, DEFAULT_TILE_SHAPE
+from registration.utils import probe_tile_dir, read_grid_coords
 
 # ---------------------------------------------------------------------------
 
@@ -29,50 +32,122 @@ def _pattern_for_mist(channel_suffix: str) -> str:
     return f"manual_r{{rr}}_c{{cc}}_0_{channel_suffix}"
 
 
-def _rename_files(tile_dir: Path, fov: int, r: int, c: int, ch: list[str]) -> None:
-    for suf in ch:
-        src = tile_dir / f"manual_{fov:03d}_0_{suf}"
-        dst = tile_dir / ROWCOL_TEMPLATE.format(row=r, col=c, suffix=suf)
-        if src.exists():
-            os.rename(src, dst)
+def _rowcol_namer(suffix: str) -> Callable[[int, int], str]:
+    """f-string equivalent of ROWCOL_TEMPLATE with *suffix* bound up front."""
+    return lambda r, c: f"manual_r{r:02d}_c{c:02d}_0_{suffix}"
+
+
+def _rename_files(
+    base: str,
+    existing: set[str],
+    fov: int,
+    r: int,
+    c: int,
+    ch: list[str],
+    namers: list[Callable[[int, int], str]],
+) -> None:
+    """
+    Rename *fov*'s channel files to row/col names.
+
+    *base* is the tile directory with a trailing separator and *existing* a
+    snapshot of its entries; paths are plain string concatenation.
+    """
+    for suf, dst_name in zip(ch, namers):
+        src_name = f"manual_{fov:03d}_0_{suf}"
+        if src_name in existing:
+            os.rename(base + src_name, base + dst_name(r, c))
+
+
+def _write_blanks(base: str, blank: np.ndarray, dst_names: list[str]) -> None:
+    """
+    Encode *blank* once and point every padding cell at it.
+
+    Each cell becomes a relative symlink to BLANK_TILE_NAME (no data written),
+    falling back to a hardlink, then to a raw write of the cached bytes. The
+    template is kept while any symlink needs it; restore_stage removes it.
+    """
+    if not dst_names:
+        return
+    # uncompressed, contiguous encode into memory: the bytes double as the
+    # payload for filesystems that refuse links
+    buf = io.BytesIO()
+    tifffile.imwrite(
+        buf, blank, compression=None, photometric="minisblack", contiguous=True
+    )
+    payload = buf.getvalue()
+    src = base + BLANK_TILE_NAME
+    with open(src, "wb") as f:
+        f.write(payload)
+
+    def _place(name: str) -> bool:
+        dst = base + name
+        try:
+            os.symlink(BLANK_TILE_NAME, dst)  # relative: resolves next to dst
+            return True
+        except OSError:  # e.g. unprivileged Windows
+            pass
+        try:
+            os.link(src, dst)
+        except OSError:  # no hardlink support (e.g. FAT, some network FS)
+            with open(dst, "wb") as f:
+                f.write(payload)
+        return False
+
+    # independent, I/O-bound filesystem ops — run them concurrently
+    symlinked = True
+    try:
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+            symlinked = any(list(ex.map(_place, dst_names)))
+    finally:
+        if not symlinked:
+            os.remove(src)
 
 
 # ---------------------------------------------------------------------------
 
 
-def generate_stage(tile_dir: Path) -> dict[str, int | str]:
+def generate_stage(tile_dir: Path) -> dict[str, int | str | list[str]]:
     """
     Rename to row/col form, fill blank cells with black tiles, print MIST hint.
 
     Returns
     -------
     dict
-        Keys: filenamePattern, gridWidth, gridHeight
+        Keys: filenamePattern, gridWidth, gridHeight, channels
     """
     tile_dir = Path(tile_dir)
-    df = pd.read_csv(tile_dir / "coordinates.csv")
+    df = read_grid_coords(tile_dir / "coordinates.csv")
 
-    xs = np.sort(df["x (mm)"].unique())
-    ys = np.sort(df["y (mm)"].unique())
+    xs = np.unique(df["x (mm)"].to_numpy())  # sorted
+    ys = np.unique(df["y (mm)"].to_numpy())
     gw, gh = len(xs), len(ys)
 
-    ch_suffixes = discover_channels(tile_dir)
-    dtype = tifffile.TiffFile(next(tile_dir.glob(f"*{ch_suffixes[0]}"))).pages[0].dtype
+    ch_suffixes, dtype = probe_tile_dir(tile_dir)
     blank = np.zeros(DEFAULT_TILE_SHAPE, dtype=dtype)
 
-    present: set[tuple[int, int]] = set()
-    for _, row in df.iterrows():
-        col = int(np.where(xs == row["x (mm)"])[0][0])
-        r = int(np.where(ys == row["y (mm)"])[0][0])
-        present.add((r, col))
-        _rename_files(tile_dir, row["fov"], r, col, ch_suffixes)
+    # grid index of every row in one vectorized pass (xs/ys are sorted)
+    cols = np.searchsorted(xs, df["x (mm)"].to_numpy())
+    rows = np.searchsorted(ys, df["y (mm)"].to_numpy())
+    fovs = df["fov"].to_numpy()
+
+    # one directory listing up front instead of a stat() per candidate file
+    base = os.fspath(tile_dir) + os.sep
+    existing = {e.name for e in os.scandir(base)}
 
-    missing = [(r, c) for r in range(gh) for c in range(gw) if (r, c) not in present]
-    for r, c in missing:
-        for suf in ch_suffixes:
-            tifffile.imwrite(
-                tile_dir / ROWCOL_TEMPLATE.format(row=r, col=c, suffix=suf), blank
-            )
+    namers = [_rowcol_namer(suf) for suf in ch_suffixes]
+
+    present = np.zeros((gh, gw), dtype=bool)
+    present[rows, cols] = True
+    for fov, r, c in zip(fovs.tolist(), rows.tolist(), cols.tolist()):
+        _rename_files(base, existing, fov, r, c, ch_suffixes, namers)
+
+    miss_r, miss_c = np.nonzero(~present)
+    missing = list(zip(miss_r.tolist(), miss_c.tolist()))
+    _write_blanks(
+        base,
+        blank,
+        [name(r, c) for r, c in missing for name in namers],
+    )
 
     print(
         f"[generate-params] grid = {gw} × {gh} | padded {len(missing)} cells\n"
@@ -87,5 +162,6 @@ def generate_stage(tile_dir: Path) -> dict[str, int | str]:
         "filenamePattern": _pattern_for_mist(ch_suffixes[0]),
         "gridWidth": gw,
         "gridHeight": gh,
+        "channels": ch_suffixes,
     }
     
\ No newline at end of file
@@ -13,7 +13,11 @@ full              : rename → generate-params → uniformize → multi‐channe
 
 from __future__ import annotations
 import argparse
+import multiprocessing as mp
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 import logging
 
@@ -23,19 +27,15 @@ from registration.uniformize_stage import uniformize_stage
 from registration.update_coordinates import update_coordinates
 from registration.restore_stage import restore_stage
 
-# Import the API from mist_stage
-from registration.mist_stage import (
-    build_params,
-    bean_to_cli_args,
-    MISTMain,
-    JStringArr,
-)
+# mist_stage is imported inside _run_one_channel: touching its Java classes
+# boots the JVM, which rename / generate-params / uniformize never need.
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
-update_coordinates
-CHANNELS = ["405"]  # , "488", "561", "638"
+# Stitch order matters (405 first, the rest reuse its metadata) → tuple
+CHANNELS = ("405",)  # , "488", "561", "638"
+CHANNEL_SUFFIX = "Fluorescence_{ch}_nm_Ex.tiff"
 
 def _add(sub, name: str, help_: str):
     p = sub.add_parser(name, help=help_)
@@ -55,31 +55,44 @@ def _build_parser() -> argparse.ArgumentParser:
     _add(sub, "generate-params",
          "rename to row/col, pad blanks, print MIST parameters")
     _add(sub, "uniformize", "enforce uniform tile shape")
-    _add(sub, "run-mist", "stitch via MIST (one channel)")
+    mist_p = _add(sub, "run-mist", "stitch via MIST (one channel)")
+    mist_p.add_argument(
+        "--isolate", action="store_true",
+        help="run MIST in a child interpreter (crash containment; pays JVM start-up)"
+    )
 
     full_p = _add(sub, "full",
                   "rename → generate-params → uniformize → multi‐channel stitching")
+    full_p.add_argument(
+        "--channel-workers", type=int, default=None,
+        help="max channels stitched at once after 405 nm; each worker is its "
+             "own JVM, so lower this on RAM-limited machines (default: all)"
+    )
     return p
 
 def _run_one_channel(
     tile_dir: Path,
     channel: str,
     metadata: Path | None,
-    assemble_from_metadata: bool
+    assemble_from_metadata: bool,
+    num_threads: int | None = None,
 ):
     """
     Build the bean for a single channel, optionally turning on
     assembleFromMetadata + globalPositionsFile, then launch MISTMain.
+    *num_threads* caps MIST's CPU threads (default: all cores).
     """
+    from registration.mist_stage import build_params, bean_to_cli_args, retile_stitched, J
+
     logger.info(f"Starting processing for channel {channel}")
-    jp = build_params(tile_dir)
+    jp = build_params(tile_dir, num_threads)
     logger.info("Built parameters successfully")
 
     # override filename pattern and prefix for this channel
     ip = jp.getInputParams()
     op = jp.getOutputParams()
 
-    pattern = f"manual_r{{rr}}_c{{cc}}_0_Fluorescence_{channel}_nm_Ex.tiff"
+    pattern = f"manual_r{{rr}}_c{{cc}}_0_{CHANNEL_SUFFIX.format(ch=channel)}"
     ip.setFilenamePattern(pattern)
     logger.info(f"Set filename pattern: {pattern}")
 
@@ -104,13 +117,12 @@ def _run_one_channel(
 
     # invoke MISTMain
     logger.info("Preparing to launch MISTMain")
-    java_argv = JStringArr(len(cli_args))
-    for i, a in enumerate(cli_args):
-        java_argv[i] = a
+    java_argv = J.JStringArr(cli_args)  # one bulk conversion, not N bridge calls
 
     logger.info("Launching MISTMain...")
     try:
-        MISTMain.main(java_argv)
+        J.MISTMain.main(java_argv)
+        retile_stitched(tile_dir.parent, prefix)
         logger.info(f"Successfully completed channel {channel}")
         return True
     except Exception as e:
@@ -149,20 +161,41 @@ def main(argv: list[str] | None = None) -> None:
 
         
         
-        # 3) Stitch other channels using that metadata
+        # 3) Stitch other channels using that metadata — they are independent,
+        #    so run them side by side, one JVM per worker process ("spawn":
+        #    never fork a process that already hosts a JVM).
         failed_channels = []
+        # channels generate_stage already found on disk — no rediscovery
+        present = set(mist_dict["channels"])
+        others = [ch for ch in CHANNELS[1:]
+                  if CHANNEL_SUFFIX.format(ch=ch) in present]
         for ch in CHANNELS[1:]:
-            logger.info(f"Starting processing for channel {ch}")
-            if not _run_one_channel(
+            if ch not in others:
+                # a configured channel with no tiles is a failed channel,
+                # as when MIST was run on it and found nothing
+                logger.error(f"No tiles for channel {ch}")
+                failed_channels.append(ch)
+        if others:
+            n_cpu = os.cpu_count() or 1
+            workers = min(len(others), n_cpu, args.channel_workers or len(others))
+            workers = max(1, workers)
+            run = partial(
+                _run_one_channel,
                 tile_dir,
-                ch,
                 metadata=meta_file,
-                assemble_from_metadata=True
-            ):
-                logger.error(f"Failed to process channel {ch}")
-                failed_channels.append(ch)
-            else:
-                logger.info(f"Completed processing for channel {ch}")
+                assemble_from_metadata=True,
+                num_threads=max(1, n_cpu // workers),  # don't oversubscribe FFTW
+            )
+            logger.info(f"Starting processing for channels {', '.join(others)}")
+            with ProcessPoolExecutor(
+                max_workers=workers, mp_context=mp.get_context("spawn")
+            ) as ex:
+                for ch, ok in zip(others, ex.map(run, others)):
+                    if not ok:
+                        logger.error(f"Failed to process channel {ch}")
+                        failed_channels.append(ch)
+                    else:
+                        logger.info(f"Completed processing for channel {ch}")
 
         if failed_channels:
             logger.error(f"The following channels failed to process: {', '.join(failed_channels)}")
@@ -185,7 +218,17 @@ def main(argv: list[str] | None = None) -> None:
         uniformize_stage(args.dir)
 
     elif args.cmd == "run-mist":
-        sys.exit("Use 'full' for multi‐channel automated runs.")
+        if args.isolate:
+            # same run-mist work (_run_one_channel) in a fresh interpreter;
+            # its exit status (1 on failure) becomes ours
+            import subprocess
+            rc = subprocess.run(
+                [sys.executable, "-m", "registration.main", "run-mist", "--dir", str(args.dir)]
+            ).returncode
+            sys.exit(rc)
+        # in-process: reuses this interpreter and a single JVM start
+        if not _run_one_channel(args.dir, "405", None, assemble_from_metadata=False):
+            sys.exit(1)
 
     else:
         sys.exit("Unknown command")
@@ -19,6 +19,7 @@ from __future__ import annotations
 import os, sys
 from pathlib import Path
 from typing import Any
+from functools import lru_cache
 import math
 import logging
 import threading
@@ -52,31 +53,79 @@ def _init_fiji() -> tuple[Any, Any]:
 
     return ij, scyjava
 
-ij, sj = _init_fiji()
+@lru_cache(maxsize=None)
+def _fiji() -> tuple[Any, Any]:
+    """Start the JVM / Fiji on first use only (non-stitch commands never pay)."""
+    return _init_fiji()
 
 # --------------------------------------------------------------------------- #
-#  Java classes
+#  Java classes (resolved lazily through ``J``)
 # --------------------------------------------------------------------------- #
-StitchParams = sj.jimport("gov.nist.isg.mist.gui.params.StitchingAppParams")
-MISTMain     = sj.jimport("gov.nist.isg.mist.MISTMain")
-JStringArr   = sj.jimport("[Ljava.lang.String;")
-
-# ENUMS
-LoaderType       = sj.jimport("gov.nist.isg.mist.lib.tilegrid.loader.TileGridLoader$LoaderType")
-GridOrigin       = sj.jimport("gov.nist.isg.mist.lib.tilegrid.loader.TileGridLoader$GridOrigin")
-GridDirection    = sj.jimport("gov.nist.isg.mist.lib.tilegrid.loader.TileGridLoader$GridDirection")
-BlendingMode     = sj.jimport("gov.nist.isg.mist.lib.export.BlendingMode")
-CompressionMode  = sj.jimport("gov.nist.isg.mist.lib.export.CompressionMode")
-Unit             = sj.jimport("gov.nist.isg.mist.lib.export.MicroscopyUnits")
-StitchingType    = sj.jimport("gov.nist.isg.mist.lib.executor.StitchingExecutor$StitchingType")
-LogType          = sj.jimport("gov.nist.isg.mist.lib.log.Log$LogType")
-DebugType        = sj.jimport("gov.nist.isg.mist.lib.log.Debug$DebugType")
-TransRefineType  = sj.jimport("gov.nist.isg.mist.lib.imagetile.Stitching$TranslationRefinementType")
-FftwPlanType     = sj.jimport("gov.nist.isg.mist.lib.imagetile.fftw.FftwPlanType")
+_JAVA_CLASSES = {
+    "StitchParams":    "gov.nist.isg.mist.gui.params.StitchingAppParams",
+    "MISTMain":        "gov.nist.isg.mist.MISTMain",
+    "JStringArr":      "[Ljava.lang.String;",
+    # ENUMS
+    "LoaderType":      "gov.nist.isg.mist.lib.tilegrid.loader.TileGridLoader$LoaderType",
+    "GridOrigin":      "gov.nist.isg.mist.lib.tilegrid.loader.TileGridLoader$GridOrigin",
+    "GridDirection":   "gov.nist.isg.mist.lib.tilegrid.loader.TileGridLoader$GridDirection",
+    "BlendingMode":    "gov.nist.isg.mist.lib.export.BlendingMode",
+    "CompressionMode": "gov.nist.isg.mist.lib.export.CompressionMode",
+    "Unit":            "gov.nist.isg.mist.lib.export.MicroscopyUnits",
+    "StitchingType":   "gov.nist.isg.mist.lib.executor.StitchingExecutor$StitchingType",
+    "LogType":         "gov.nist.isg.mist.lib.log.Log$LogType",
+    "DebugType":       "gov.nist.isg.mist.lib.log.Debug$DebugType",
+    "TransRefineType": "gov.nist.isg.mist.lib.imagetile.Stitching$TranslationRefinementType",
+    "FftwPlanType":    "gov.nist.isg.mist.lib.imagetile.fftw.FftwPlanType",
+}
+
+class _LazyJava:
+    """Namespace that jimports a class on first attribute access, then caches it."""
+    def __getattr__(self, name: str) -> Any:
+        try:
+            java_name = _JAVA_CLASSES[name]
+        except KeyError:
+            raise AttributeError(name) from None
+        cls = _fiji()[1].jimport(java_name)
+        setattr(self, name, cls)
+        return cls
+
+J = _LazyJava()
+
+def __getattr__(name: str) -> Any:
+    # keep ``from registration.mist_stage import MISTMain`` etc. working
+    if name in _JAVA_CLASSES:
+        return getattr(J, name)
+    if name in ("ij", "sj"):
+        return _fiji()[0 if name == "ij" else 1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # --------------------------------------------------------------------------- #
 #  Helper: bean → exact CLI args
 # --------------------------------------------------------------------------- #
+# params whose getter suffix doesn't match the parameter name
+_GETTER_SUFFIX = {
+    "gridOrigin":       "Origin",
+    "numberingPattern": "Numbering",
+}
+
+# bean class → [(parameter name, unbound getter)]; resolved once per class
+_GETTERS: dict[Any, list[tuple[str, Any]]] = {}
+
+def _getters_for(bean: Any) -> list[tuple[str, Any]]:
+    cls = type(bean)
+    getters = _GETTERS.get(cls)
+    if getters is None:
+        getters = []
+        for name in map(str, bean.getParameterNamesList()):
+            cap = _GETTER_SUFFIX.get(name, name[0].upper() + name[1:])
+            # pick the real getter/is-er
+            fn = getattr(cls, f"get{cap}", None) or getattr(cls, f"is{cap}", None)
+            if fn is not None:
+                getters.append((name, fn))
+        _GETTERS[cls] = getters
+    return getters
+
 def bean_to_cli_args(jp: Any) -> list[str]:
     parts = {
         "InputParams":    jp.getInputParams(),
@@ -86,29 +135,14 @@ def bean_to_cli_args(jp: Any) -> list[str]:
     }
     cli: list[str] = []
     for bean in parts.values():
-        names = list(bean.getParameterNamesList())
-        for name in names:
-            # ← CHANGED: handle params whose getter suffix doesn't match the name
-            cap = {
-                "gridOrigin":       "Origin",
-                "numberingPattern": "Numbering",
-            }.get(name, name[0].upper() + name[1:])
-
-            # pick the real getter/is-er
-            if hasattr(bean, f"get{cap}"):
-                val = getattr(bean, f"get{cap}")()
-            elif hasattr(bean, f"is{cap}"):
-                val = getattr(bean, f"is{cap}")()
-            else:
-                continue
-
+        for name, getter in _getters_for(bean):
+            val = getter(bean)
             if val is None:
                 continue
             if hasattr(val, "name"):
                 val = val.name()
 
             # NaN → 'NaN'
-            import math
             sval = "NaN" if isinstance(val, float) and math.isnan(val) else str(val)
 
             cli += [f"--{name}", sval]
@@ -119,8 +153,8 @@ def bean_to_cli_args(jp: Any) -> list[str]:
 # --------------------------------------------------------------------------- #
 #  Build fully-specified params bean (no JSON) — returns the bean itself
 # --------------------------------------------------------------------------- #
-def build_params(tile_dir: Path) -> Any:  # ← CHANGED: now returns StitchParams bean
-    jp  = StitchParams()
+def build_params(tile_dir: Path, num_threads: int | None = None) -> Any:  # ← CHANGED: now returns StitchParams bean
+    jp  = J.StitchParams()
     ip  = jp.getInputParams()
     op  = jp.getOutputParams()
     adv = jp.getAdvancedParams()
@@ -129,11 +163,11 @@ def build_params(tile_dir: Path) -> Any:  # ← CHANGED: now returns StitchParam
     # ── INPUT ──────────────────────────────────────────────────────────────
     ip.setImageDir(tile_dir.as_posix())
     ip.setFilenamePattern("current_r{rr}_c{cc}_0_Fluorescence_405_nm_Ex.bmp")
-    ip.setFilenamePatternLoaderType(LoaderType.ROWCOL)
+    ip.setFilenamePatternLoaderType(J.LoaderType.ROWCOL)
     ip.setGridWidth(8)
     ip.setGridHeight(11)
-    ip.setOrigin(GridOrigin.UL)
-    ip.setNumbering(GridDirection.HORIZONTALCOMBING)
+    ip.setOrigin(J.GridOrigin.UL)
+    ip.setNumbering(J.GridDirection.HORIZONTALCOMBING)
     ip.setStartTileRow(0)
     ip.setStartTileCol(0)
     ip.setStartRow(0)
@@ -147,32 +181,32 @@ def build_params(tile_dir: Path) -> Any:  # ← CHANGED: now returns StitchParam
     # ── OUTPUT ─────────────────────────────────────────────────────────────
     op.setOutputPath(str(tile_dir.parent))
     op.setOutFilePrefix("Fluo405_")
-    op.setBlendingMode(BlendingMode.OVERLAY)
+    op.setBlendingMode(J.BlendingMode.OVERLAY)
     op.setBlendingAlpha(float(0.0))
-    op.setCompressionMode(CompressionMode.UNCOMPRESSED)
+    op.setCompressionMode(J.CompressionMode.UNCOMPRESSED)
     op.setDisplayStitching(False)
     op.setOutputFullImage(False)
     op.setOutputMeta(True)
     op.setOutputImgPyramid(False)
-    op.setPerPixelUnit(Unit.MICROMETER)
+    op.setPerPixelUnit(J.Unit.MICROMETER)
     op.setPerPixelX(7.52)
     op.setPerPixelY(7.52) 
 
     # ── ADVANCED ───────────────────────────────────────────────────────────
-    adv.setProgramType(StitchingType.FFTW)
+    adv.setProgramType(J.StitchingType.FFTW)
     adv.setUseDoublePrecision(True)
-    adv.setNumCPUThreads(os.cpu_count())
+    adv.setNumCPUThreads(num_threads or os.cpu_count())
     adv.setHorizontalOverlap(float("nan"))
     adv.setVerticalOverlap(float("nan"))
     adv.setOverlapUncertainty(float("nan"))
     adv.setNumFFTPeaks(0)
     adv.setRepeatability(0)
-    adv.setTranslationRefinementType(TransRefineType.SINGLE_HILL_CLIMB)
+    adv.setTranslationRefinementType(J.TransRefineType.SINGLE_HILL_CLIMB)
     adv.setNumTranslationRefinementStartPoints(16)
     adv.setSuppressModalWarningDialog(True)
     adv.setUseBioFormats(False)
     adv.setEnableCudaExceptions(False)
-    adv.setFftwPlanType(FftwPlanType.PATIENT)
+    adv.setFftwPlanType(J.FftwPlanType.PATIENT)
     adv.setSaveFFTWPlan(True)
     adv.setLoadFFTWPlan(True)
     adv.setFftwLibraryName("libfftw3")
@@ -181,11 +215,43 @@ def build_params(tile_dir: Path) -> Any:  # ← CHANGED: now returns StitchParam
     adv.setPlanPath(str(tile_dir.parent / "lib" / "fftw" / "fftPlans"))
 
     # ── LOGGING ────────────────────────────────────────────────────────────
-    lg.setLogLevel(LogType.MANDATORY)
-    lg.setDebugLevel(DebugType.NONE)
+    lg.setLogLevel(J.LogType.MANDATORY)
+    lg.setDebugLevel(J.DebugType.NONE)
 
     return jp  # ← CHANGED: no more JSON, return bean
 
+# --------------------------------------------------------------------------- #
+#  Post-stitch: tiled output for random-access viewers
+# --------------------------------------------------------------------------- #
+def retile_stitched(
+    output_dir: Path, prefix: str, tile: tuple[int, int] = (256, 256)
+) -> int:
+    """
+    Rewrite MIST's strip-organised ``{prefix}stitched-*.tif`` as tiled BigTIFF.
+
+    MIST has no tile-layout option for the assembled image, so this is done
+    after the fact. No-op when full-image output is off (the default in
+    build_params). Returns the number of files rewritten.
+    """
+    import tifffile
+
+    n = 0
+    for p in sorted(Path(output_dir).glob(f"{prefix}stitched-*.tif")):
+        try:
+            data = tifffile.memmap(p, mode="r")
+        except ValueError:  # compressed / not memory-mappable
+            data = tifffile.imread(p)
+        tmp = p.with_suffix(".tmp.tif")
+        tifffile.imwrite(
+            tmp, data, tile=tile, compression="zlib", bigtiff=True,
+            photometric="minisblack",
+        )
+        del data
+        tmp.replace(p)
+        n += 1
+        logger.info(f"Rewrote {p.name} as {tile[0]}x{tile[1]} tiled TIFF")
+    return n
+
 def run_mist_with_timeout(java_argv: Any, timeout_seconds: int = 3600) -> bool:
     """
     Run MIST with a timeout. Returns True if successful, False if timed out.
@@ -195,7 +261,7 @@ def run_mist_with_timeout(java_argv: Any, timeout_seconds: int = 3600) -> bool:
     def run_mist():
         try:
             logger.info("Starting MIST process")
-            MISTMain.main(java_argv)
+            J.MISTMain.main(java_argv)
             result["success"] = True
             logger.info("MIST process completed successfully")
         except Exception as e:
@@ -257,14 +323,13 @@ def _run_one_channel(
         cli_args = bean_to_cli_args(jp)
         logger.info(f"Generated CLI arguments for channel {channel}")
 
-        java_argv = JStringArr(len(cli_args))
-        for i, a in enumerate(cli_args):
-            java_argv[i] = a
+        java_argv = J.JStringArr(cli_args)  # one bulk conversion, not N bridge calls
 
         logger.info(f"Launching MIST for channel {channel}")
         success = run_mist_with_timeout(java_argv)
         
         if success:
+            retile_stitched(tile_dir.parent, prefix)
             logger.info(f"Successfully completed channel {channel}")
         else:
             logger.error(f"Failed to complete channel {channel}")
@@ -288,12 +353,10 @@ def main() -> None:
 
     jp = build_params(tile_dir)                         # ← CHANGED
     cli_args = bean_to_cli_args(jp)                     # ← CHANGED
-    java_argv = JStringArr(len(cli_args))
-    for i, arg in enumerate(cli_args):
-        java_argv[i] = arg                              # ← CHANGED
+    java_argv = J.JStringArr(cli_args)                  # ← CHANGED
 
     print("Launching MIST with exact bean-derived flags…")
-    MISTMain.main(java_argv)                            # ← CHANGED
+    J.MISTMain.main(java_argv)                          # ← CHANGED
     print(" MIST stitching job started — tail Fiji's *Log* window.")
 
 if __name__ == "__main__":
@@ -19,6 +19,8 @@ input_dir/
 Dependencies
 ------------
 • CuPy (GPU path) – falls back to NumPy if CuPy isn’t available
+• SciPy (optional) – sparse least squares for the global alignment
+• PyArrow (optional) – fast CSV writer + Parquet sidecar for the output
 • tifffile, pandas, numpy
 """
 from __future__ import annotations
@@ -27,16 +29,25 @@ import numpy as np
 import pandas as pd
 import tifffile
 
+from registration.utils import write_coords
+
 # ---------- optional GPU backend ------------------------------------------------
 try:
     import cupy as xp
-    from cupyx.scipy.fft import fft2, ifft2  # CUDA FFT
+    from cupyx.scipy.fft import rfft2, irfft2  # CUDA FFT
     GPU = True
 except ImportError:  # CPU fallback
     import numpy as xp  # type: ignore
-    from numpy.fft import fft2, ifft2  # type: ignore
+    from numpy.fft import rfft2, irfft2  # type: ignore
     GPU = False
 
+# ---------- optional sparse solver ----------------------------------------------
+try:
+    import scipy.sparse as sp
+    from scipy.sparse.linalg import lsqr
+except ImportError:  # dense lstsq fallback
+    sp = None  # type: ignore
+
 # ---------- phase‑correlation helpers -------------------------------------------
 EPS = 1e-8
 
@@ -50,77 +61,102 @@ def phase_correlation(imgA: np.ndarray, imgB: np.ndarray) -> tuple[float, float]
     HB, WB = b.shape
     H, W = HA + HB - 1, WA + WB - 1  # linear correlation size
 
-    FA = fft2(a, s=(H, W))
-    FB = fft2(b, s=(H, W))
-    R = FA * xp.conj(FB)
-    R /= xp.abs(R) + EPS  # cross‑power
-    corr = ifft2(R)
-    corr = xp.abs(corr)
-
-    peak_idx = int(xp.argmax(corr))
-    peak_y, peak_x = np.unravel_index(peak_idx, corr.shape)  # cpu indices ok
-
-    # sub‑pixel quadratic interpolation on 3×3 neighborhood
-    def quad_interp(mat: np.ndarray, axis: int, center_idx: int) -> float:
-        if center_idx == 0 or center_idx == mat.shape[axis] - 1:
-            return 0.0
-
-        if axis == 0:
-            # rows: scalar values
-            c1 = mat[center_idx - 1, 1]
-            c  = mat[center_idx    , 1]
-            c2 = mat[center_idx + 1, 1]
-        else:
-            # cols: scalar values
-            c1 = mat[1, center_idx - 1]
-            c  = mat[1, center_idx    ]
-            c2 = mat[1, center_idx + 1]
-
-        denom = 2 * (c1 - 2 * c + c2)
-        return float((c1 - c2) / denom) if denom != 0 else 0.0
-
-    # gather local 3×3 window on CPU
-    y0, y1 = max(0, peak_y - 1), min(corr.shape[0] - 1, peak_y + 1)
-    x0, x1 = max(0, peak_x - 1), min(corr.shape[1] - 1, peak_x + 1)
-    local = corr[y0:y1 + 1, x0:x1 + 1].get() if GPU else corr[y0:y1 + 1, x0:x1 + 1]
-
-    dy_frac = quad_interp(local, 0, peak_y - y0)
-    dx_frac = quad_interp(local, 1, peak_x - x0)
-
-    refined_peak_y = peak_y + dy_frac
-    refined_peak_x = peak_x + dx_frac
-
-    dy = refined_peak_y - (HB - 1)
-    dx = refined_peak_x - (WB - 1)
+    FA = rfft2(a, s=(H, W)).astype(xp.complex64, copy=False)
+    FB = rfft2(b, s=(H, W)).astype(xp.complex64, copy=False)
+    dy, dx = shift_from_spectra(FA, FB, HB, WB, (H, W))
 
     # free GPU memory for big arrays
     if GPU:
-        del a, b, FA, FB, R, corr
+        del a, b, FA, FB
         xp.get_default_memory_pool().free_all_blocks()
-    return float(dy), float(dx)
+    return dy, dx
+
+def tile_spectra(imgs: list[np.ndarray], shape: tuple[int, int]):
+    """One batched real 2‑D FFT of equally sized tiles zero‑padded to *shape*.
+
+    Returns complex64 of shape (K, shape[0], shape[1] // 2 + 1) – the
+    half‑spectrum, since the tiles are real.
+    """
+    stack = xp.asarray(np.stack(imgs), dtype=xp.float32)
+    # NumPy < 2 promotes to complex128; keep single precision on both paths
+    return rfft2(stack, s=shape, axes=(-2, -1)).astype(xp.complex64, copy=False)
+
+def fft_plan(shape: tuple[int, int]):
+    """cuFFT C2R plan for one padded inverse transform to *shape*; None on the CPU path."""
+    if not GPU:
+        return None
+    from cupyx.scipy.fftpack import get_fft_plan
+    half = xp.empty((shape[0], shape[1] // 2 + 1), dtype=xp.complex64)
+    return get_fft_plan(half, shape=shape, axes=(0, 1), value_type="C2R")
+
+def shift_from_spectra(
+    FA, FB, HB: int, WB: int, shape: tuple[int, int], plan=None
+) -> tuple[float, float]:
+    """(dy, dx) from the padded half‑spectra of A and B.
+
+    *HB*, *WB* = shape of B, *shape* = padded size. *plan* (see fft_plan) is
+    reused for the inverse FFT instead of letting every call look one up.
+    """
+    R = FA * xp.conj(FB)
+    R /= xp.abs(R) + EPS  # cross‑power
+    if plan is None:
+        corr = irfft2(R, s=shape)
+    else:
+        corr = irfft2(R, s=shape, plan=plan)
+    corr = xp.abs(corr)
+
+    Hc, Wc = corr.shape
+    peak_y, peak_x = divmod(int(xp.argmax(corr)), Wc)
+
+    # sub‑pixel quadratic interpolation along each axis, done on the device:
+    # gather [up, left, centre, down, right] with one fancy index, so the
+    # only host transfer is the two resulting fractions. The correlation is
+    # circular, so the neighbours of an edge peak wrap around.
+    ys = xp.asarray([(peak_y - 1) % Hc, peak_y, peak_y, (peak_y + 1) % Hc, peak_y])
+    xs = xp.asarray([peak_x, (peak_x - 1) % Wc, peak_x, peak_x, (peak_x + 1) % Wc])
+    v = corr[ys, xs]
+    c1, c, c2 = v[0:2], v[2], v[3:5]
+    denom = 2 * (c1 - 2 * c + c2)
+    frac = xp.where(denom != 0, (c1 - c2) / xp.where(denom != 0, denom, 1), 0)
+    dy_frac, dx_frac = frac.tolist()
+
+    # peak index → lag: indices past the positive range hold negative lags
+    dy = peak_y - Hc if peak_y >= Hc - (HB - 1) else peak_y
+    dx = peak_x - Wc if peak_x >= Wc - (WB - 1) else peak_x
+    return float(dy + dy_frac), float(dx + dx_frac)
+
+def overlap_px(deltas_mm: list[float], tile_px: int, pixel_size_mm: float) -> int:
+    """Strip width (px) covering the widest expected overlap along one axis.
+
+    The overlap follows from the stage step between neighbours; a margin of
+    10 % of the tile (≥ 16 px) absorbs stage error.
+    """
+    if not deltas_mm:
+        return tile_px
+    step_px = min(abs(d) for d in deltas_mm) / pixel_size_mm
+    margin = max(16, tile_px // 10)
+    return int(min(tile_px, max(1, math.ceil(tile_px - step_px) + margin)))
+
+def _open_tile(path: str) -> np.ndarray:
+    """Read-only memory map of *path*; decodes only if the TIFF is compressed."""
+    try:
+        return tifffile.memmap(path, mode="r")
+    except ValueError:  # not memory-mappable (compressed / tiled / strided)
+        return tifffile.imread(path)
 
 # ---------- grid discovery helpers ---------------------------------------------
 
-def group_rows_by_y(fovs: list[int], y_coords: dict[int, float], tile_height_mm: float) -> list[list[int]]:
-    """Group FOVs into rows using a y‑gap threshold = 0.5 * tile_height."""
-    tol = 0.5 * tile_height_mm
-    sorted_fovs = sorted(fovs, key=lambda f: y_coords[f])
+def group_rows_by_y(
+    fovs: np.ndarray, x: np.ndarray, y: np.ndarray, tile_height_mm: float
+) -> list[list[int]]:
+    """Group FOVs into rows using a y‑gap threshold = 0.5 * tile_height; rows sorted by x."""
+    fovs, x, y = np.asarray(fovs), np.asarray(x), np.asarray(y)
+    order = np.argsort(y, kind="stable")
+    breaks = np.flatnonzero(np.abs(np.diff(y[order])) > 0.5 * tile_height_mm) + 1
     rows: list[list[int]] = []
-    current_row: list[int] = []
-    prev_y: float | None = None
-    for fov in sorted_fovs:
-        y = y_coords[fov]
-        if prev_y is None or abs(y - prev_y) <= tol:
-            current_row.append(fov)
-        else:
-            rows.append(current_row)
-            current_row = [fov]
-        prev_y = y
-    if current_row:
-        rows.append(current_row)
-    # sort each row by x coordinate
-    for row in rows:
-        row.sort(key=lambda f: x_coords[f])
+    for idx in np.split(order, breaks):
+        idx = idx[np.argsort(x[idx], kind="stable")]
+        rows.append(fovs[idx].tolist())
     return rows
 
 # ---------- main pipeline -------------------------------------------------------
@@ -141,10 +177,12 @@ def main() -> None:
     pixel_size_mm: float = params["sensor_pixel_size_um"] / 1000.0
 
     df = pd.read_csv(coord_csv)
-    fovs = df["fov"].astype(int).tolist()
-    global x_coords, y_coords  # used in helper above
-    x_coords = {int(r["fov"]): float(r["x (mm)"]) for _, r in df.iterrows()}
-    y_coords = {int(r["fov"]): float(r["y (mm)"]) for _, r in df.iterrows()}
+    fov_arr = df["fov"].to_numpy(dtype=np.int64)
+    x_arr = df["x (mm)"].to_numpy(dtype=np.float64)
+    y_arr = df["y (mm)"].to_numpy(dtype=np.float64)
+    fovs = fov_arr.tolist()
+    x_coords = dict(zip(fovs, x_arr.tolist()))
+    y_coords = dict(zip(fovs, y_arr.tolist()))
 
     # --- load first tile to get size ---
     sample_file = os.path.join(subdir, f"manual_{fovs[0]}_0_Fluorescence_405_nm_Ex.tiff")
@@ -153,69 +191,103 @@ def main() -> None:
     tile_w_mm = W_tile * pixel_size_mm
     tile_h_mm = H_tile * pixel_size_mm
 
-    # --- load all images into dict (numpy) ---
+    # --- map all images read-only (float32 cast happens per pair) ---
     tiles: dict[int, np.ndarray] = {}
     for fov in fovs:
         filename = os.path.join(subdir, f"manual_{fov}_0_Fluorescence_405_nm_Ex.tiff")
         if not os.path.exists(filename):
             sys.exit(f"Missing TIFF for fov {fov}: {filename}")
-        tiles[fov] = tifffile.imread(filename).astype(np.float32)
+        tiles[fov] = _open_tile(filename)
 
     # --- build neighbor pairs (grid assumption) ---
-    rows = group_rows_by_y(fovs, y_coords, tile_h_mm)
-    neighbor_pairs: list[tuple[int, int]] = []
+    rows = group_rows_by_y(fov_arr, x_arr, y_arr, tile_h_mm)
+    right_pairs: list[tuple[int, int]] = []
+    below_pairs: list[tuple[int, int]] = []
     n_rows = len(rows)
     for r, row in enumerate(rows):
         n_cols = len(row)
         for c, fov in enumerate(row):
             # right neighbor
             if c < n_cols - 1:
-                neighbor_pairs.append((fov, row[c + 1]))
+                right_pairs.append((fov, row[c + 1]))
             # below neighbor (pick tile closest in x)
             if r < n_rows - 1:
                 below_row = rows[r + 1]
                 x_curr = x_coords[fov]
                 below_fov = min(below_row, key=lambda f: abs(x_coords[f] - x_curr))
-                neighbor_pairs.append((fov, below_fov))
-
-    print(f"GPU backend: {'CuPy' if GPU else 'NumPy'} | neighbor pairs: {len(neighbor_pairs)}")
+                below_pairs.append((fov, below_fov))
+
+    n_pairs = len(right_pairs) + len(below_pairs)
+    print(f"GPU backend: {'CuPy' if GPU else 'NumPy'} | neighbor pairs: {n_pairs}")
+
+    # --- compute pairwise shifts on the overlap strips ---
+    # Only the expected overlap can correlate, so each pair is registered on
+    # A's trailing / B's leading strip of that width instead of the full
+    # tiles; the strip offset inside A is added back to the shift. Every strip
+    # is used by exactly one pair; spectra are batched per grid row of pairs.
+    ov_x = overlap_px([x_coords[b] - x_coords[a] for a, b in right_pairs], W_tile, pixel_size_mm)
+    ov_y = overlap_px([y_coords[b] - y_coords[a] for a, b in below_pairs], H_tile, pixel_size_mm)
+    lanes = (
+        # pairs, strip of A, strip of B, (dy, dx) offset of A's strip
+        (right_pairs, np.s_[:, W_tile - ov_x:], np.s_[:, :ov_x], (0, W_tile - ov_x)),
+        (below_pairs, np.s_[H_tile - ov_y:, :], np.s_[:ov_y, :], (H_tile - ov_y, 0)),
+    )
+    batch = max(len(row) for row in rows)
 
-    # --- compute pairwise shifts ---
     shifts: dict[tuple[int, int], tuple[float, float]] = {}
-    for fovA, fovB in neighbor_pairs:
-        dy, dx = phase_correlation(tiles[fovA], tiles[fovB])
-        shifts[(fovA, fovB)] = (dy, dx)
-        print(f"Pair ({fovA},{fovB}) shift = ({dy:.3f}px,{dx:.3f}px)")
+    for pairs, cut_a, cut_b, (off_y, off_x) in lanes:
+        if not pairs:
+            continue
+        sh, sw = tiles[pairs[0][0]][cut_a].shape
+        pad_shape = (2 * sh - 1, 2 * sw - 1)
+        plan = fft_plan(pad_shape)  # every pair in this lane has this shape
+        for k in range(0, len(pairs), batch):
+            chunk = pairs[k:k + batch]
+            FA = tile_spectra([tiles[a][cut_a] for a, _ in chunk], pad_shape)
+            FB = tile_spectra([tiles[b][cut_b] for _, b in chunk], pad_shape)
+            for (fovA, fovB), fa, fb in zip(chunk, FA, FB):
+                dy, dx = shift_from_spectra(fa, fb, sh, sw, pad_shape, plan)
+                dy, dx = dy + off_y, dx + off_x
+                shifts[(fovA, fovB)] = (dy, dx)
+                print(f"Pair ({fovA},{fovB}) shift = ({dy:.3f}px,{dx:.3f}px)")
+            del FA, FB
+    del tiles  # release the mappings before the solve
+    if GPU:
+        xp.get_default_memory_pool().free_all_blocks()
 
     # --- global least‑squares alignment ---
-    idx_map = {f: i for i, f in enumerate(fovs)}
+    # incidence matrix: one row per pair (-1 at A, +1 at B) plus the anchor;
+    # at most two non-zeros per row, so keep it sparse (COO triplets), built
+    # from index arrays rather than per-pair Python lists
     N = len(fovs)
-    A_x, b_x, A_y, b_y = [], [], [], []
-    for (fa, fb), (dy, dx) in shifts.items():
-        i, j = idx_map[fa], idx_map[fb]
-        dx_mm = dx * pixel_size_mm
-        dy_mm = dy * pixel_size_mm
-        stage_dx = x_coords[fb] - x_coords[fa]
-        stage_dy = y_coords[fb] - y_coords[fa]
-        row = [0] * N
-        row[i], row[j] = -1, 1
-        A_x.append(row); b_x.append(dx_mm - stage_dx)
-        A_y.append(row.copy()); b_y.append(dy_mm - stage_dy)
-
-    # anchor first tile
-    anchor = idx_map[fovs[0]]
-    row = [0] * N; row[anchor] = 1
-    A_x.append(row); b_x.append(0.0)
-    A_y.append(row.copy()); b_y.append(0.0)
-
-    dx_corr = np.linalg.lstsq(np.array(A_x), np.array(b_x), rcond=None)[0]
-    dy_corr = np.linalg.lstsq(np.array(A_y), np.array(b_y), rcond=None)[0]
+    P = len(shifts)
+    M = P + 1
+    pair_fovs = np.array(list(shifts), dtype=np.int64).reshape(P, 2)
+    meas_px = np.array(list(shifts.values()), dtype=np.float64).reshape(P, 2)  # (dy, dx)
+    order = np.argsort(fov_arr)
+    ia, ib = order[np.searchsorted(fov_arr, pair_fovs, sorter=order)].T
+
+    a_rows = np.append(np.repeat(np.arange(P), 2), M - 1)
+    a_cols = np.append(np.column_stack((ia, ib)).ravel(), 0)  # anchor first tile
+    a_vals = np.append(np.tile([-1.0, 1.0], P), 1.0)
+    b_x = np.append(meas_px[:, 1] * pixel_size_mm - (x_arr[ib] - x_arr[ia]), 0.0)
+    b_y = np.append(meas_px[:, 0] * pixel_size_mm - (y_arr[ib] - y_arr[ia]), 0.0)
+
+    if sp is not None:
+        A = sp.csr_matrix((a_vals, (a_rows, a_cols)), shape=(M, N))
+        dx_corr = lsqr(A, b_x, atol=1e-12, btol=1e-12)[0]
+        dy_corr = lsqr(A, b_y, atol=1e-12, btol=1e-12)[0]
+    else:
+        A = np.zeros((M, N))
+        A[a_rows, a_cols] = a_vals
+        dx_corr = np.linalg.lstsq(A, b_x, rcond=None)[0]
+        dy_corr = np.linalg.lstsq(A, b_y, rcond=None)[0]
 
     df_out = df.copy()
-    df_out["x (mm)"] = [x_coords[f] + dx_corr[idx_map[f]] for f in fovs]
-    df_out["y (mm)"] = [y_coords[f] + dy_corr[idx_map[f]] for f in fovs]
+    df_out["x (mm)"] = x_arr + dx_corr
+    df_out["y (mm)"] = y_arr + dy_corr
     out_path = os.path.join(subdir, "coordinates_refined.csv")
-    df_out.to_csv(out_path, index=False)
+    write_coords(df_out, out_path)
     print(f"Refined coordinates written to {out_path}")
 
 if __name__ == "__main__":
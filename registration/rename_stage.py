@@ -3,31 +3,44 @@
 from __future__ import annotations
 import pandas as pd
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import os
-from registration.utils import iter_tiffs
-from registration.constants import FOV_SUFFIX_RE
+from registration.constants import FOV_SUFFIX_PAT
+from registration.utils import write_coords
 
 def rename_stage(tile_dir: Path) -> None:
     csv_path = tile_dir / "coordinates.csv"
     df = pd.read_csv(csv_path)
-    renamed = 0
 
-    for p in iter_tiffs(tile_dir):
-        fov, suffix = _split(p.name)
-        fov_zp = f"{fov:03d}"
-        new_name = f"manual_{fov_zp}_0_{suffix}"
-        if p.name != new_name:
-            os.rename(p, p.with_name(new_name))
-            renamed += 1
+    # one scandir pass; DirEntry names are cached, paths are plain strings.
+    # Collect first, rename after: never mutate a directory mid-listing.
+    base = os.fspath(tile_dir) + os.sep
+    pairs: list[tuple[str, str]] = []
+    with os.scandir(base) as it:
+        for e in it:
+            name = e.name
+            # same selection as iter_tiffs' "manual_*_0_*.tiff"
+            if not (name.startswith("manual_") and name.endswith(".tiff")
+                    and "_0_" in name[7:]):
+                continue
+            fov, suffix = _split(name)
+            new_name = f"manual_{fov:03d}_0_{suffix}"
+            if name != new_name:
+                pairs.append((e.path, base + new_name))
+
+    # metadata syscalls release the GIL; targets are distinct, so order is free
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as ex:
+        list(ex.map(lambda p: os.rename(*p), pairs))
+    renamed = len(pairs)
 
     # pad FOV column in CSV
-    df["fov"] = df["fov"].apply(lambda x: int(x))  # ensure int
-    df.to_csv(csv_path, index=False)
+    if df["fov"].dtype.kind != "i":  # ensure int (vectorized cast)
+        df["fov"] = df["fov"].astype("int64")
+    write_coords(df, csv_path)
     print(f"[rename] updated {renamed} TIFFs and rewrote coordinates.csv")
 
 def _split(filename: str) -> tuple[int, str]:
-    import re
-    m = re.match(FOV_SUFFIX_RE, filename)
+    m = FOV_SUFFIX_PAT.match(filename)
     if not m:
         raise ValueError(f"unrecognised filename: {filename}")
     return int(m.group(1)), m.group(2)
\ No newline at end of file
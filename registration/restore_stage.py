@@ -2,66 +2,74 @@ from __future__ import annotations
 from pathlib import Path
 import os
 import re
+import numpy as np
 import pandas as pd
 
+from registration.constants import BLANK_TILE_NAME
+
+# Row/col filenames written by generate_stage
+_RC_PATTERN = re.compile(r"^manual_r(?P<r>\d+)_c(?P<c>\d+)_0_(?P<suffix>.+\.tiff)$")
+# Padded-FOV filenames written by rename_stage / step 1 below
+_ZP_PATTERN = re.compile(r"^manual_(?P<fov>\d+)_0_(?P<suffix>.+\.tiff)$")
+
 
 def restore_stage(tile_dir: Path) -> None:
     """
     Restore original TIFF filenames and remove padded blank tiles.
 
-    Steps:
-      1) Revert row/column names to padded-FOV names (manual_{fov:03d}_0_suffix), removing blanks.
-      2) Strip zero-padding from padded-FOV names to original manual_{fov}_0_suffix.
+    One directory scan plans every rename straight to the final name:
+      • row/column names → manual_{fov}_0_suffix (blanks / unmapped cells removed)
+      • padded-FOV names (manual_{fov:03d}_0_suffix) → manual_{fov}_0_suffix
     """
     tile_dir = Path(tile_dir)
     df = pd.read_csv(tile_dir / "coordinates.csv")
-    xs = sorted(df["x (mm)"].unique())
-    ys = sorted(df["y (mm)"].unique())
+    x_mm = df["x (mm)"].to_numpy()
+    y_mm = df["y (mm)"].to_numpy()
+    xs = np.unique(x_mm)  # sorted
+    ys = np.unique(y_mm)
 
-    # Pattern for row/col filenames
-    rc_pattern = re.compile(r"^manual_r(?P<r>\d+)_c(?P<c>\d+)_0_(?P<suffix>.+\.tiff)$")
-    renamed = removed = 0
+    # (row, col) -> fov, built once; reversed so the first row wins on duplicates
+    rc = zip(np.searchsorted(ys, y_mm).tolist(), np.searchsorted(xs, x_mm).tolist())
+    fov_by_rc = dict(reversed(list(zip(rc, df["fov"].astype(int).tolist()))))
 
-    # 1) Revert row/col mapping and delete blank tiles
-    for p in tile_dir.glob("manual_r*_c*_0_*.tiff"):
-        m = rc_pattern.match(p.name)
-        if not m:
-            continue
-        r, c = int(m.group("r")), int(m.group("c"))
-        suffix = m.group("suffix")
+    base = os.fspath(tile_dir) + os.sep
+    plan: list[tuple[str, str]] = []
+    renamed = removed = 0
 
-        # delete if out-of-grid or no matching coordinate
-        if r >= len(ys) or c >= len(xs):
-            os.remove(p)
-            removed += 1
+    # list the directory first (iterator closed) so deletions below never
+    # run under an open scandir
+    with os.scandir(base) as it:
+        entries = list(it)
+    for entry in entries:
+        name = entry.name
+        m = _RC_PATTERN.match(name)
+        if m:
+            r, c = int(m.group("r")), int(m.group("c"))
+            # delete if out-of-grid or no matching coordinate
+            fov = fov_by_rc.get((r, c))
+            if fov is None:
+                os.remove(entry.path)
+                removed += 1
+                continue
+            plan.append((name, f"manual_{fov}_0_{m.group('suffix')}"))
+            renamed += 1
             continue
+        m = _ZP_PATTERN.match(name)
+        if m:
+            # strip zero-padding from FOV indices, preserving the '_0_' separator
+            dst = f"manual_{int(m.group('fov'))}_0_{m.group('suffix')}"
+            if dst != name:
+                plan.append((name, dst))
 
-        sub = df[(df["x (mm)"] == xs[c]) & (df["y (mm)"] == ys[r])]
-        if sub.empty:
-            os.remove(p)
-            removed += 1
-            continue
+    for src, dst in plan:
+        os.replace(base + src, base + dst)
+    stripped = len(plan)
 
-        fov = int(sub.iloc[0]["fov"])
-        new_name = f"manual_{fov:03d}_0_{suffix}"
-        os.rename(p, tile_dir / new_name)
-        renamed += 1
+    # padding symlinks are gone; drop the blank tile they pointed at
+    try:
+        os.remove(base + BLANK_TILE_NAME)
+    except FileNotFoundError:
+        pass
 
     print(f"[update_coordinates] reverted {renamed} files; removed {removed} blanks")
-
-    # Pattern for padded-FOV filenames
-    zp_pattern = re.compile(r"^manual_(?P<fov>\d+)_0_(?P<suffix>.+\.tiff)$")
-    stripped = 0
-
-    # 2) Strip zero-padding from FOV indices, preserving the '_0_' separator
-    for p in tile_dir.glob("manual_*_0_*.tiff"):
-        m = zp_pattern.match(p.name)
-        if not m:
-            continue
-        fov = int(m.group("fov"))
-        suffix = m.group("suffix")
-        new_name = f"manual_{fov}_0_{suffix}"
-        os.rename(p, tile_dir / new_name)
-        stripped += 1
-
     print(f"[update_coordinates] stripped zero-padding from {stripped} files")
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from registration.update_coordinates import _fit_line, update_coordinates
+
+
+def test_fit_line_recovers_slope_and_intercept():
+    x = np.array([0, 100, 200, 300], dtype=float)
+    slope, intercept = _fit_line(x, 0.5 + 0.01 * x)
+    assert slope == pytest.approx(0.01)
+    assert intercept == pytest.approx(0.5)
+
+
+def test_fit_line_constant_x_is_finite():
+    slope, intercept = _fit_line([5] * 5, [3.2] * 5)
+    assert (slope, intercept) == (0.0, pytest.approx(3.2))
+
+
+def test_single_row_grid_writes_finite_coordinates(tmp_path):
+    # one row of three tiles: y is constant on both sides of the fit
+    tile_dir = tmp_path / "0"
+    tile_dir.mkdir()
+    pd.DataFrame({
+        "fov": [0, 1, 2],
+        "x (mm)": [1.0, 2.0, 3.0],
+        "y (mm)": [4.0, 4.0, 4.0],
+    }).to_csv(tile_dir / "coordinates.csv", index=False)
+    (tmp_path / "Fluo405_global-positions-1.txt").write_text("\n".join(
+        f"file: manual_r0_c{c}_0_Fluorescence_405_nm_Ex.tiff; position: ({c * 1000}, 0);"
+        for c in range(3)
+    ))
+
+    update_coordinates(tile_dir)
+
+    out = pd.read_csv(tile_dir / "coordinates.csv")
+    assert np.isfinite(out[["x (mm)", "y (mm)"]].to_numpy()).all()
+    np.testing.assert_allclose(out["x (mm)"], [1.0, 2.0, 3.0])
+    np.testing.assert_allclose(out["y (mm)"], [4.0, 4.0, 4.0])
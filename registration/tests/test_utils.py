@@ -0,0 +1,20 @@
+import pandas as pd
+
+from registration.utils import write_coords
+
+
+def test_write_coords_csv_matches_pandas(tmp_path):
+    df = pd.DataFrame({
+        "region": ["A1", "B2"],
+        "fov": [0, 1],
+        "x (mm)": [1.0, 2.5],
+        "y (mm)": [3.25, 4.0],
+        "time": [1.7e9, 1.7e9 + 0.5],
+    })
+    write_coords(df, tmp_path / "coordinates.csv")
+    df.to_csv(tmp_path / "expected.csv", index=False)
+
+    # byte for byte: the CSV is the interchange file
+    written = (tmp_path / "coordinates.csv").read_bytes()
+    assert written == (tmp_path / "expected.csv").read_bytes()
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "coordinates.csv"), df)
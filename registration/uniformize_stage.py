@@ -4,32 +4,62 @@ from __future__ import annotations
 from pathlib import Path
 import numpy as np, tifffile, os
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from registration.utils import iter_tiffs, center_crop, zero_pad, overwrite_tiff
 from registration.constants import DEFAULT_TILE_SHAPE
 
+# shape-only header reads: skip tifffile's vendor-format probing
+_OPEN_KWARGS = {"is_mmstack": False, "is_ome": False, "is_imagej": False}
+
+
+def _load_window(p: Path, shp: tuple[int, int], target_shape) -> np.ndarray:
+    """
+    *p* cropped or padded to *target_shape*, opening the file once.
+
+    Only the first page is used, as measured by _tile_shape (*shp*).
+    Uncompressed single-page tiles are memory-mapped so a crop only faults
+    in its window; the result is copied off the mapping before the file is
+    replaced.
+    """
+    try:
+        img = tifffile.memmap(p, mode="r")
+    except ValueError:  # compressed / tiled: decode below
+        img = None
+    if img is None or img.shape != tuple(shp):
+        # compressed, or a multi-page series: decode the first page only
+        img = tifffile.imread(p, key=0)
+    if shp[0] >= target_shape[0] and shp[1] >= target_shape[1]:
+        out = np.array(center_crop(img, target_shape))
+    else:
+        out = zero_pad(img, target_shape, reuse=True)  # written right away
+    del img
+    return out
+
+
+def _tile_shape(p: Path) -> tuple[int, int]:
+    with tifffile.TiffFile(p, **_OPEN_KWARGS) as tif:
+        return tif.pages[0].shape
+
+
+def _fix_one(job: tuple[Path, tuple[int, int], tuple[int, int]]) -> None:
+    p, shp, target_shape = job
+    overwrite_tiff(p, _load_window(p, shp, target_shape))
+
+
 def uniformize_stage(tile_dir: Path, target_shape=DEFAULT_TILE_SHAPE) -> None:
-    # gather stats
-    shapes = {}
-    for p in iter_tiffs(tile_dir, "manual_r*_c*_0_*.tiff"):
-        with tifffile.TiffFile(p) as tif:
-            shp = tif.pages[0].shape
-        shapes[p] = shp
-
-    counts = Counter(shapes.values())
-    modal = counts.most_common(1)[0][0]
-    if modal != target_shape:
-        target_shape = modal  # follow majority
-
-    fixed = 0
-    for p, shp in shapes.items():
-        if shp == target_shape:
-            continue
-        with tifffile.TiffFile(p) as tif:
-            img = tif.pages[0].asarray()
-        img = (center_crop(img, target_shape)
-               if (shp[0] >= target_shape[0] and shp[1] >= target_shape[1])
-               else zero_pad(img, target_shape))
-        overwrite_tiff(p, img)
-        fixed += 1
-
-    print(f"[uniformize] target = {target_shape}, fixed {fixed} tiles")
\ No newline at end of file
+    # independent, I/O-bound files (tifffile releases the GIL while decoding)
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as ex:
+        # gather stats (header only)
+        paths = iter_tiffs(tile_dir, "manual_r*_c*_0_*.tiff")
+        shapes = dict(zip(paths, ex.map(_tile_shape, paths)))
+
+        counts = Counter(shapes.values())
+        modal = counts.most_common(1)[0][0]
+        if modal != target_shape:
+            target_shape = modal  # follow majority
+
+        jobs = [(p, shp, target_shape) for p, shp in shapes.items() if shp != target_shape]
+        list(ex.map(_fix_one, jobs))
+        fixed = len(jobs)
+
+    print(f"[uniformize] target = {target_shape}, fixed {fixed} tiles")
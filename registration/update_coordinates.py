@@ -7,8 +7,32 @@ import pandas as pd
 import logging
 import sys
 
+from registration.utils import write_coords
+
 logger = logging.getLogger(__name__)
 
+# One tile line of MIST's global-positions file
+_MIST_POSITION_PAT = re.compile(
+    r"manual_r(?P<r>\d+)_c(?P<c>\d+)_0_.*?position:\s*\((?P<x_px>\d+),\s*(?P<y_px>\d+)\)"
+)
+
+def _fit_line(x, y):
+    """
+    Least-squares slope and intercept of y = slope * x + intercept.
+
+    A constant x (one grid row or column on that axis) has no slope to
+    fit: slope 0 and intercept mean(y), which still reproduces y.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    mx, my = x.mean(), y.mean()
+    dx = x - mx
+    denom = (dx * dx).sum()
+    if denom == 0:
+        return 0.0, my
+    slope = (dx * (y - my)).sum() / denom
+    return slope, my - slope * mx
+
 def update_coordinates(tile_dir: Path) -> None:
     """
     After MIST has written Fluo*_global-positions-*.txt, 
@@ -31,51 +55,44 @@ def update_coordinates(tile_dir: Path) -> None:
     txt_path = txt_files[0]
 
     # 3) Parse pixel positions
-    pattern = re.compile(
-        r"manual_r(?P<r>\d+)_c(?P<c>\d+)_0_.*?position:\s*\((?P<x_px>\d+),\s*(?P<y_px>\d+)\)"
-    )
-    records = []
-    with open(txt_path) as f:
-        for line in f:
-            m = pattern.search(line)
-            if m:
-                records.append({k: int(v) for k, v in m.groupdict().items()})
-    df_txt = pd.DataFrame(records)
+    lines = pd.Series(Path(txt_path).read_text().splitlines())
+    df_txt = lines.str.extract(_MIST_POSITION_PAT).dropna().astype("int64")
 
-    # 4) Map back to original mm-grid
-    xs = np.sort(df_coords["x (mm)"].unique())
-    ys = np.sort(df_coords["y (mm)"].unique())
-    df_map = df_coords[["fov", "x (mm)", "y (mm)"]].copy()
-    df_map["c"] = df_map["x (mm)"].apply(lambda x: int(np.where(xs == x)[0][0]))
-    df_map["r"] = df_map["y (mm)"].apply(lambda y: int(np.where(ys == y)[0][0]))
-    df_map.rename(
-        columns={"x (mm)": "x_mm_orig", "y (mm)": "y_mm_orig"},
-        inplace=True
-    )
-    dfm = df_map.merge(df_txt, on=["r", "c"], how="inner", validate="one_to_one")
-    assert len(dfm) == N, f"Joined {len(dfm)}/{N} tiles; check mapping."
+    # 4) Map back to original mm-grid: one int64 (row, col) key per tile
+    #    on both sides; both are 1:1 on it, so the MIST pixels are gathered
+    #    in coordinates.csv row order by a reindex instead of a merge
+    x_mm = df_coords["x (mm)"].to_numpy()
+    y_mm = df_coords["y (mm)"].to_numpy()
+    xs = np.unique(x_mm)  # sorted
+    ys = np.unique(y_mm)
+    c = np.searchsorted(xs, x_mm)
+    r = np.searchsorted(ys, y_mm)
+    assert (xs[c] == x_mm).all() and (ys[r] == y_mm).all()
+    key = (r.astype(np.int64) << 32) | c.astype(np.int64)
+    assert len(np.unique(key)) == N, "Duplicate grid positions in coordinates.csv"
+    txt_key = (df_txt["r"].to_numpy() << 32) | df_txt["c"].to_numpy()
+    px = df_txt[["x_px", "y_px"]].set_index(txt_key)
+    assert px.index.is_unique, "Duplicate tiles in MIST global positions"
+    px = px.reindex(key)
+    found = int(px["x_px"].notna().sum())
+    assert found == N, f"Joined {found}/{N} tiles; check mapping."
+    x_px = px["x_px"].to_numpy(np.float64)
+    y_px = px["y_px"].to_numpy(np.float64)
 
     # 5) Fit mm↔px linear model
-    Sx, Bx = np.polyfit(dfm["x_px"], dfm["x_mm_orig"], 1)
-    Sy, By = np.polyfit(dfm["y_px"], dfm["y_mm_orig"], 1)
+    Sx, Bx = _fit_line(x_px, x_mm)
+    Sy, By = _fit_line(y_px, y_mm)
     print("Fitted mapping:")
     print(f"  X: slope = {Sx:.6f} mm/px, intercept = {Bx:.6f} mm")
     print(f"  Y: slope = {Sy:.6f} mm/px, intercept = {By:.6f} mm\n")
 
 
-    # 6) Apply calibration
-    dfm["x_mm_cal"] = Sx * dfm["x_px"] + Bx
-    dfm["y_mm_cal"] = Sy * dfm["y_px"] + By
-
-    # 7) Merge back and save
-    df_final = df_coords.merge(
-        dfm[["fov", "x_mm_cal", "y_mm_cal"]],
-        on="fov", validate="one_to_one"
-    ).drop(columns=["x (mm)", "y (mm)"]).rename(
-        columns={"x_mm_cal": "x (mm)", "y_mm_cal": "y (mm)"}
-    )
+    # 6) Apply calibration; the calibrated columns go last, as before
+    df_final = df_coords.drop(columns=["x (mm)", "y (mm)"])
+    df_final["x (mm)"] = Sx * x_px + Bx
+    df_final["y (mm)"] = Sy * y_px + By
 
     out_csv = tile_dir/ "coordinates.csv"
-    df_final.to_csv(out_csv, index=False)
+    write_coords(df_final, out_csv)
     print(f"Calibrated coordinates written to {out_csv}")
     print(df_final.head())
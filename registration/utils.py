@@ -1,24 +1,170 @@
 """Shared helpers: I/O, regex, crop / pad helpers."""
 
+from functools import lru_cache
 from pathlib import Path
 from typing import Iterable, Tuple, List
-import re
+import fnmatch
+import os
+import struct
+import threading
 import numpy as np
+import pandas as pd
 import tifffile
 
-from stitcher_pipeline.constants import DEFAULT_TILE_SHAPE, FOV_SUFFIX_RE
+from registration.constants import DEFAULT_TILE_SHAPE, FOV_SUFFIX_PAT
+
+# ---------- optional fast CSV backend ------------------------------------------
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pandas fallback
+    pa = pa_csv = pq = None  # type: ignore[assignment]
 
 # ------------------------------------------------------------------ I/O utils
 def iter_tiffs(directory: Path, glob_pat: str = "manual_*_0_*.tiff") -> Iterable[Path]:
     """Yield TIFF paths in sorted order."""
-    return sorted(directory.glob(glob_pat))
+    # one scandir pass; names are matched before any stat, and DirEntry
+    # already carries the file type on most filesystems
+    with os.scandir(directory) as it:
+        names = [
+            e.name for e in it
+            if fnmatch.fnmatchcase(e.name, glob_pat) and e.is_file()
+        ]
+    names.sort()
+    directory = Path(directory)
+    return [directory / n for n in names]
+
+# (BitsPerSample, SampleFormat) → dtype for single-sample-per-pixel tiles
+_TIFF_DTYPES = {
+    (8, 1): np.uint8, (16, 1): np.uint16, (32, 1): np.uint32, (64, 1): np.uint64,
+    (8, 2): np.int8, (16, 2): np.int16, (32, 2): np.int32, (64, 2): np.int64,
+    (16, 3): np.float16, (32, 3): np.float32, (64, 3): np.float64,
+}
+
+def tiff_dtype(path: str | Path) -> np.dtype:
+    """
+    Pixel dtype of the first page of *path*, read from the raw IFD header.
+
+    Only the header and the first IFD's entries are read (tags 258/339);
+    anything unusual (multi-sample pixels, odd bit depths) falls back to
+    tifffile.
+    """
+    with open(path, "rb") as f:
+        head = f.read(16)
+        bo = {b"II": "<", b"MM": ">"}.get(head[:2])
+        if bo is not None:
+            (magic,) = struct.unpack_from(bo + "H", head, 2)
+            if magic == 42:      # classic TIFF: 4-byte offsets, 12-byte entries
+                cnt_fmt, ent_fmt = "H", "HHI4s"
+                (ifd,) = struct.unpack_from(bo + "I", head, 4)
+            elif magic == 43:    # BigTIFF: 8-byte offsets, 20-byte entries
+                cnt_fmt, ent_fmt = "Q", "HHQ8s"
+                (ifd,) = struct.unpack_from(bo + "Q", head, 8)
+            else:
+                bo = None
+        if bo is not None:
+            f.seek(ifd)
+            cnt_size = struct.calcsize(bo + cnt_fmt)
+            (n,) = struct.unpack(bo + cnt_fmt, f.read(cnt_size))
+            ent_size = struct.calcsize(bo + ent_fmt)
+            raw = f.read(n * ent_size)
+            tags = {258: None, 339: 1, 277: 1}
+            for i in range(n):
+                tag, typ, count, val = struct.unpack_from(bo + ent_fmt, raw, i * ent_size)
+                if tag in tags and count == 1 and typ == 3:  # single SHORT, inline
+                    tags[tag] = struct.unpack_from(bo + "H", val)[0]
+            dtype = _TIFF_DTYPES.get((tags[258], tags[339]))
+            if dtype is not None and tags[277] == 1:
+                return np.dtype(dtype)
+    with tifffile.TiffFile(path) as tif:
+        return tif.pages[0].dtype
+
+@lru_cache(maxsize=32)
+def _probe_tile_dir(directory: str, mtime_ns: int) -> Tuple[Tuple[str, ...], np.dtype | None]:
+    """Channel suffixes + pixel dtype of *directory*; *mtime_ns* keys the cache."""
+    first: dict[str, str] = {}
+    with os.scandir(directory) as it:
+        for e in it:
+            if not e.name.endswith(".tiff"):
+                continue
+            m = FOV_SUFFIX_PAT.match(e.name)
+            if m:
+                first.setdefault(m.group(2), e.path)
+    if not first:
+        return (), None
+    channels = tuple(sorted(first))
+    return channels, tiff_dtype(first[channels[0]])
+
+def probe_tile_dir(directory: Path) -> Tuple[List[str], np.dtype]:
+    """
+    Return (sorted channel suffixes, tile dtype) for *directory*.
+
+    Memoized on the directory's mtime, so repeated calls between stages cost
+    a single stat() until something in the directory is added or renamed.
+    """
+    directory = os.fspath(directory)
+    channels, dtype = _probe_tile_dir(directory, os.stat(directory).st_mtime_ns)
+    if not channels:
+        raise FileNotFoundError(f"No manual_*_0_*.tiff tiles found in {directory}")
+    return list(channels), dtype
 
 def discover_channels(directory: Path) -> List[str]:
     """Return sorted list of channel suffixes detected in *directory*."""
-    pat = re.compile(FOV_SUFFIX_RE)
-    return sorted({pat.match(p.name).group(2)            # type: ignore[arg-type]
-                   for p in iter_tiffs(directory)
-                   if pat.match(p.name)})
+    directory = os.fspath(directory)
+    return list(_probe_tile_dir(directory, os.stat(directory).st_mtime_ns)[0])
+
+# Only the columns the grid stages need, with fixed dtypes (no inference pass)
+GRID_CSV_DTYPES = {"fov": "int32", "x (mm)": "float64", "y (mm)": "float64"}
+
+def read_grid_coords(csv_path: Path) -> pd.DataFrame:
+    """
+    Read the fov / x / y columns of a coordinates.csv.
+
+    Uses PyArrow's multithreaded CSV reader when installed, else pandas' C
+    parser; either way the result has plain NumPy-backed columns. A
+    ``coordinates.parquet`` sidecar (see write_coords) is preferred when it is
+    at least as new as the CSV.
+    """
+    csv_path = Path(csv_path)
+    if pa is not None:
+        pq_path = csv_path.with_suffix(".parquet")
+        try:
+            fresh = pq_path.stat().st_mtime_ns >= csv_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            fresh = False
+        if fresh:
+            df = pd.read_parquet(pq_path, columns=list(GRID_CSV_DTYPES))
+            return df.astype(GRID_CSV_DTYPES, copy=False)
+    if pa_csv is not None:
+        table = pa_csv.read_csv(
+            csv_path,
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=list(GRID_CSV_DTYPES),
+                column_types={k: pa.type_for_alias(v) for k, v in GRID_CSV_DTYPES.items()},
+            ),
+        )
+        return table.to_pandas()
+    return pd.read_csv(
+        csv_path,
+        usecols=list(GRID_CSV_DTYPES),
+        dtype=GRID_CSV_DTYPES,
+        engine="c",
+    )
+
+def write_coords(df: pd.DataFrame, csv_path: Path) -> None:
+    """
+    Write *df* to *csv_path* and, with pyarrow installed, a snappy Parquet
+    sidecar next to it for fast re-reads. The CSV stays the interchange file
+    (MIST, rtviewer and the acquisition software all read it), so it is
+    always written by to_csv: pyarrow's CSV writer quotes every string and
+    header and prints whole floats without ".0", i.e. a different file.
+    """
+    csv_path = Path(csv_path)
+    df.to_csv(csv_path, index=False)
+    if pa is not None:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_table(table, str(csv_path.with_suffix(".parquet")), compression="snappy")
 
 # --------------------------------------------------------- shape manipulators
 def center_crop(arr: np.ndarray, target: Tuple[int, int]) -> np.ndarray:
@@ -27,17 +173,44 @@ def center_crop(arr: np.ndarray, target: Tuple[int, int]) -> np.ndarray:
     c0 = (arr.shape[1] - target[1]) // 2
     return arr[r0 : r0 + target[0], c0 : c0 + target[1]]
 
-def zero_pad(arr: np.ndarray, target: Tuple[int, int]) -> np.ndarray:
-    """Pad *arr* with black pixels centrally to *target* shape."""
-    out = np.zeros(target, dtype=arr.dtype)
-    r0 = (target[0] - arr.shape[0]) // 2
-    c0 = (target[1] - arr.shape[1]) // 2
-    out[r0 : r0 + arr.shape[0], c0 : c0 + arr.shape[1]] = arr
+_PAD_BUF = threading.local()
+
+def zero_pad(
+    arr: np.ndarray, target: Tuple[int, int], reuse: bool = False
+) -> np.ndarray:
+    """
+    Pad *arr* with black pixels centrally to *target* shape.
+
+    With *reuse*, the result is a per-thread scratch frame that is only valid
+    until the next reuse call on the same thread (for write-and-forget callers
+    such as uniformize_stage); only its margins are re-zeroed.
+    """
+    h, w = arr.shape[:2]
+    r0 = (target[0] - h) // 2
+    c0 = (target[1] - w) // 2
+    out = getattr(_PAD_BUF, "buf", None) if reuse else None
+    if out is None or out.shape != tuple(target) or out.dtype != arr.dtype:
+        out = np.zeros(target, dtype=arr.dtype)
+        if reuse:
+            _PAD_BUF.buf = out
+    else:
+        out[:r0] = 0
+        out[r0 + h :] = 0
+        out[r0 : r0 + h, :c0] = 0
+        out[r0 : r0 + h, c0 + w :] = 0
+    out[r0 : r0 + h, c0 : c0 + w] = arr
     return out
 
 # -------------------------------------------------------------- TIFF helpers
 def overwrite_tiff(path: Path, image: np.ndarray) -> None:
     """Safely overwrite *path* with *image* (atomic replace)."""
     tmp = path.with_suffix(".tmp.tiff")
-    tifffile.imwrite(tmp, image)
+    # Uncompressed, contiguous strips rather than zlib tiles: MIST reads these
+    # tiles whole through ImageJ's own reader (no tiled-TIFF support) and the
+    # Python stages memory-map them, which only works uncompressed. No
+    # metadata block, and BigTIFF only when the frame needs it.
+    tifffile.imwrite(
+        tmp, image, compression=None, photometric="minisblack",
+        contiguous=True, metadata=None, bigtiff=image.nbytes >= 2**31,
+    )
     tmp.replace(path)
\ No newline at end of file
@@ -1,16 +1,25 @@
 import threading
-from typing import Tuple
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import cached_property
+from typing import Dict, Set, Tuple
 import numpy as np
-from cachetools import LRUCache
 from .datasource import DataSource
 
 
 class TileCache:
     """
-    LRU cache for image tiles, evicting based on total memory usage in bytes.
+    CLOCK (second-chance) cache for image tiles, evicting based on total
+    memory usage in bytes.
 
-    Thread-safe: uses a threading.Lock around cache operations.
+    Thread-safe: a threading.Lock guards the cache itself, while loads run
+    outside it with one in-flight Future per key, so concurrent misses on
+    different tiles load in parallel and each tile is still loaded only once.
+    prefetch() runs such loads on a background pool of PREFETCH_WORKERS
+    threads.
     """
+    PREFETCH_WORKERS = 8
+
     def __init__(self, datasource: DataSource, max_bytes: int) -> None:
         """
         Initialize the tile cache.
@@ -20,16 +29,20 @@ class TileCache:
         datasource : DataSource
             Underlying data source for loading tiles when missing in cache.
         max_bytes : int
-            Maximum total bytes to store in cache before evicting least-recently-used tiles.
+            Maximum total bytes to store in cache before evicting tiles not
+            used since the eviction hand last passed them.
         """
         self.datasource = datasource
         self.max_bytes = max_bytes
-        # Cache with byte-based eviction
-        self.cache: LRUCache[Tuple[int, int, int], np.ndarray] = LRUCache(
-            maxsize=max_bytes,
-            getsizeof=lambda arr: arr.nbytes
-        )
+        # Cache with byte-based CLOCK eviction: tiles queue in insertion
+        # order, and a hit only sets the tile's reference bit (no reordering).
+        # Eviction takes the oldest tile, but one with its bit set gets a
+        # second chance: the bit is cleared and the tile re-queued at the end
+        self.cache: "OrderedDict[Tuple[int, int, int], np.ndarray]" = OrderedDict()
+        self._referenced: Set[Tuple[int, int, int]] = set()
+        self._bytes = 0
         self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[int, int, int], Future] = {}
 
     def get(self, fov: int, z: int, level: int) -> np.ndarray:
         """
@@ -60,11 +73,29 @@ class TileCache:
         """
         key = (int(fov), int(z), int(level))
         with self._lock:
-            if key in self.cache:
-                return self.cache[key]
+            tile = self.cache.get(key)
+            if tile is not None:
+                self._referenced.add(key)
+                return tile
+            fut = self._inflight.get(key)
+            mine = fut is None
+            if mine:
+                fut = self._inflight[key] = Future()
+
+        if not mine:
+            # another thread is loading this key: wait for its result (or error)
+            return fut.result()
 
-            # Load under lock to prevent duplicate loads
-            tile = self.datasource.load_tile(fov, z, level)
+        try:
+            base = None
+            if key[2] > 1:
+                # a coarser level of a resident full-res tile is just a stride
+                with self._lock:
+                    base = self.cache.get(key[:2] + (1,))
+            if base is not None:
+                tile = np.ascontiguousarray(base[..., ::key[2], ::key[2]])
+            else:
+                tile = self.datasource.load_tile(fov, z, level)
 
             if not isinstance(tile, np.ndarray):
                 raise TypeError(
@@ -75,9 +106,32 @@ class TileCache:
                 raise ValueError(
                     f"Tile size {size} bytes exceeds cache maximum of {self.max_bytes} bytes"
                 )
+        except BaseException as exc:
+            with self._lock:
+                del self._inflight[key]
+            fut.set_exception(exc)
+            raise
+
+        with self._lock:
+            self._insert(key, tile)
+            del self._inflight[key]
+        fut.set_result(tile)
+        return tile
+
+    @cached_property
+    def _prefetch_pool(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.PREFETCH_WORKERS)
 
-            self.cache[key] = tile
-            return tile
+    def prefetch(self, fov: int, z: int, level: int) -> Future:
+        """
+        Start loading a tile in the background and return immediately.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            Resolves to the tile (or its load error), as get() would.
+        """
+        return self._prefetch_pool.submit(self.get, fov, z, level)
 
     def put(self, fov: int, z: int, level: int, tile: np.ndarray) -> None:
         """
@@ -111,4 +165,21 @@ class TileCache:
                 f"Tile size {size} bytes exceeds cache maximum of {self.max_bytes} bytes"
             )
         with self._lock:
-            self.cache[(int(fov), int(z), int(level))] = tile
+            self._insert((int(fov), int(z), int(level)), tile)
+
+    def _insert(self, key: Tuple[int, int, int], tile: np.ndarray) -> None:
+        """Queue *tile* unreferenced after evicting room for it (lock held)."""
+        old = self.cache.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        self._referenced.discard(key)
+        # evict before queueing, so the new tile itself is never the victim
+        while self.cache and self._bytes + tile.nbytes > self.max_bytes:
+            victim, evicted = self.cache.popitem(last=False)
+            if victim in self._referenced:  # second chance
+                self._referenced.discard(victim)
+                self.cache[victim] = evicted
+                continue
+            self._bytes -= evicted.nbytes
+        self.cache[key] = tile
+        self._bytes += tile.nbytes
@@ -5,8 +5,9 @@ from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor
 import napari
 from qtpy.QtCore import QTimer
-from typing import Any, Dict, Tuple, List
+from typing import Any, Dict, Tuple, List, Optional
 
+import numpy as np
 import pandas as pd
 
 from .datasource import DataSource
@@ -21,6 +22,9 @@ class ViewerController:
     Controller tying DataSource, TileCache, PyramidBuilder, MISTAdapter, and TileRenderer
     into a Napari viewer that stitches tiles on zoom/pan events in real time.
     """
+    # quiet period (ms) that ends a burst of camera events
+    VIEW_DEBOUNCE_MS = 100
+
     def __init__(
         self,
         datasource: DataSource,
@@ -31,7 +35,8 @@ class ViewerController:
         max_workers: int = 4,
     ) -> None:
         """
-        Initialize controller with components and a thread pool for background stitching.
+        Initialize controller with components and a thread pool for background
+        stitching; tile loads go through the cache's own prefetch pool.
         """
         self.datasource = datasource
         self.cache = cache
@@ -40,26 +45,43 @@ class ViewerController:
         self.renderer = renderer
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
 
+        # camera-event coalescing: only the newest event's stitch runs
+        self._view_gen = 0
+        self._future: Any = None
+
         # Napari viewer and layer will be set in run()
         self.viewer: Any = None
         self.image_layer: Any = None
 
         # Precompute tile center positions (in pixel coords)
         self.tile_centers: Dict[int, Tuple[float, float]] = self.datasource.get_tile_centers()
-
-        # Infer full grid dimensions from coordinates.csv (z=0)
-        coords_csv = self.datasource.root / "0" / "coordinates.csv"
-        df = pd.read_csv(coords_csv)
-        xs = df["x (mm)"].unique()
-        ys = df["y (mm)"].unique()
-        self.grid_ncols = len(xs)
-        self.grid_nrows = len(ys)
+        # ... and as a grid index for the per-event visibility test: sorted
+        # unique centre columns/rows plus grid[row, col] = fov (-1 for gaps),
+        # so a viewport is two searchsorted calls and a slice
+        items = sorted(self.tile_centers.items())
+        fov_ids = np.fromiter((f for f, _ in items), dtype=np.int64, count=len(items))
+        ycxc = np.array([c for _, c in items], dtype=np.float64).reshape(-1, 2)
+        self._ys, rows = np.unique(ycxc[:, 0], return_inverse=True)
+        self._xs, cols = np.unique(ycxc[:, 1], return_inverse=True)
+        self._grid = np.full((len(self._ys), len(self._xs)), -1, dtype=np.int64)
+        self._grid[rows, cols] = fov_ids
+
+        # Infer full grid dimensions from coordinates.csv (z=0), reusing the
+        # datasource's parse
+        df = self.datasource.coords_df
+        self.grid_ncols = df["x (mm)"].nunique()
+        self.grid_nrows = df["y (mm)"].nunique()
 
     def run(self, root: Path) -> None:
         """
         Launch Napari, show overview, and hook zoom & pan events.
+
+        *root* must be the directory the DataSource was built on.
         """
-        self.datasource.root = root
+        if Path(root) != self.datasource.root:
+            raise ValueError(
+                f"root '{root}' does not match the DataSource root '{self.datasource.root}'"
+            )
 
         # Build overview pyramid levels
         levels = self.pyramid.build_levels()
@@ -83,11 +105,38 @@ class ViewerController:
 
         napari.run()
 
+    def _ring(self, r0: int, r1: int, c0: int, c1: int) -> List[int]:
+        """FOVs in the one-cell border around grid window [r0:r1, c0:c1]."""
+        nr, nc = self._grid.shape
+        R0, R1 = max(r0 - 1, 0), min(r1 + 1, nr)
+        C0, C1 = max(c0 - 1, 0), min(c1 + 1, nc)
+        ring = self._grid[R0:R1, C0:C1].copy()
+        ring[r0 - R0:r1 - R0, c0 - C0:c1 - C0] = -1  # drop the visible window
+        return ring[ring >= 0].tolist()
+
+    def _load_and_align(self, tile_futs: List[Any]) -> Any:
+        """Wait for the visible tiles to load, then align them."""
+        tiles = [f.result() for f in tile_futs]
+        return self.adapter.align_tiles(tiles, self.grid_nrows, self.grid_ncols)
+
     def on_view_changed(self, event: Any = None) -> None:
         """
-        Called on zoom or pan: determine visible tiles, stitch them in background,
-        and update the composite on the Qt main thread.
+        Called on zoom or pan. A single drag fires dozens of zoom/center
+        events, so each one just (re)arms a VIEW_DEBOUNCE_MS single-shot and
+        only the last event of a burst goes on to stitch.
         """
+        self._view_gen += 1
+        gen = self._view_gen
+        QTimer.singleShot(self.VIEW_DEBOUNCE_MS, lambda: self._do_view_changed(gen))
+
+    def _do_view_changed(self, gen: Optional[int] = None) -> None:
+        """
+        Determine visible tiles, stitch them in background, and update the
+        composite on the Qt main thread.
+        """
+        if gen is not None and gen != self._view_gen:
+            return  # superseded by a later camera event
+
         cam = self.viewer.camera
         center = cam.center  # (y, x)
         zoom = cam.zoom
@@ -103,20 +152,33 @@ class ViewerController:
         xmin, xmax = center[1] - half_w, center[1] + half_w
 
         # Figure out which FOVs lie inside the current view
-        visible_fovs: List[int] = [
-            fov for fov, (y_c, x_c) in self.tile_centers.items()
-            if xmin <= x_c <= xmax and ymin <= y_c <= ymax
-        ]
-
-        # Load those tiles at full resolution
-        tiles = [ self.cache.get(fov, 0, 1) for fov in visible_fovs ]
-
-        # Submit the headless‐MIST stitch job
-        future = self.executor.submit(
-            self.adapter.align_tiles,
-            tiles,
-            self.grid_nrows,
-            self.grid_ncols
+        # bounds are inclusive: left edge for the min, right edge for the max
+        c0 = np.searchsorted(self._xs, xmin, side="left")
+        c1 = np.searchsorted(self._xs, xmax, side="right")
+        r0 = np.searchsorted(self._ys, ymin, side="left")
+        r1 = np.searchsorted(self._ys, ymax, side="right")
+        sub = self._grid[r0:r1, c0:c1]
+        visible = sub[sub >= 0]
+        visible_fovs: List[int] = visible.tolist()
+
+        # Load those tiles at full resolution, all at once on the cache's
+        # prefetch pool (misses overlap, hits return straight away); queued
+        # before the ring so they are first in line
+        tile_futs = [self.cache.prefetch(fov, 0, 1) for fov in visible_fovs]
+
+        # Warm the cache with the ring of tiles just outside the view, so the
+        # next pan mostly hits
+        for fov in self._ring(r0, r1, c0, c1):
+            self.cache.prefetch(fov, 0, 1)
+
+        # Submit the headless‐MIST stitch job, which waits for the loads off
+        # the Qt thread; the view has moved past any job still queued
+        if self._future is not None and not self._future.done():
+            self._future.cancel()
+        gen = self._view_gen
+        future = self._future = self.executor.submit(
+            self._load_and_align,
+            tile_futs,
         )
 
         def on_done(fut):
@@ -124,6 +186,9 @@ class ViewerController:
             # If you want UI feedback, use a Shapes/Text layer, but Napari Viewer.add_text
             # does not exist, so we stick to console logs.
 
+            if gen != self._view_gen:
+                return  # stale viewport (this also covers cancelled jobs)
+
             # Check for error
             if fut.exception():
                 print(f"[ERROR] stitching failed: {fut.exception()}")
@@ -131,8 +196,11 @@ class ViewerController:
 
             # Map tile_index → fov
             df = fut.result()
-            df["fov"] = df["tile_index"].map(lambda idx: visible_fovs[idx])
-            offsets = df[["fov", "dx", "dy"]]
+            offsets = pd.DataFrame({
+                "fov": visible[df["tile_index"].to_numpy()],
+                "dx": df["dx"].to_numpy(),
+                "dy": df["dy"].to_numpy(),
+            })
 
             # Pick downsample factor
             if zoom < 6:
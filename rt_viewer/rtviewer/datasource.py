@@ -1,8 +1,14 @@
+import hashlib
+import math
 import os
 import re
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from operator import itemgetter
 from pathlib import Path
-from typing import Union, Dict, Tuple, List
+from typing import Union, Dict, Tuple, List, Iterator, Optional
 
 import numpy as np
 import pandas as pd
@@ -12,7 +18,60 @@ import tifffile
 # Regex to parse filenames: manual_{fov}_0_{suffix}.tiff
 FNAME_RE = re.compile(r"^manual_(?P<fov>\d+)_0_(?P<suffix>.+)\.tiff$", re.IGNORECASE)
 
-ChannelTile = Tuple[str, Path]
+# Default overview chunk size: whole tiles, ~128 MiB per chunk
+OVERVIEW_CHUNK_BYTES = 128 * 1024 * 1024
+
+
+def _first_plane(arr: np.ndarray, path: Union[str, Path]) -> np.ndarray:
+    """*arr* itself if 2-D, its first plane if 3-D."""
+    if arr.ndim not in (2, 3):
+        raise ValueError(f"Unexpected dimensions {arr.shape} for '{path}'")
+    return arr[0] if arr.ndim == 3 else arr
+
+
+def _read_plane0(path: Union[str, Path]) -> np.ndarray:
+    """First plane of *path*, decoding only the first page of a multi-page file."""
+    with tifffile.TiffFile(path) as tif:
+        return _first_plane(tif.asarray(key=0), path)
+
+
+_scratch = threading.local()
+
+
+def _scratch_plane(shape: Tuple[int, ...], dtype: np.dtype) -> np.ndarray:
+    """
+    This thread's reusable decode buffer for one full-resolution plane.
+
+    Only for planes that are strided and copied out before the thread
+    decodes again; never return it (or a view of it) to a caller.
+    """
+    buf = getattr(_scratch, "buf", None)
+    if buf is None or buf.shape != shape or buf.dtype != dtype:
+        buf = _scratch.buf = np.empty(shape, dtype=dtype)
+    return buf
+
+
+# Stage positions closer than this (mm) are the same grid column / row
+COORD_TOL_MM = 1e-4
+
+
+def _grid_index(pos_mm: np.ndarray) -> Tuple[np.ndarray, int]:
+    """Index of each position among the sorted distinct positions, and their count."""
+    keys = np.round(np.asarray(pos_mm, dtype=np.float64) / COORD_TOL_MM).astype(np.int64)
+    uniq = np.unique(keys)
+    return np.searchsorted(uniq, keys), len(uniq)
+
+
+def _iter_tiffs(root: str) -> Iterator[os.DirEntry]:
+    """Entries named *.tiff anywhere under *root* (symlinked dirs not followed)."""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    stack.append(e.path)
+                elif e.name.endswith(".tiff"):
+                    yield e
 
 class DataSource:
     """
@@ -22,8 +81,12 @@ class DataSource:
     load individual tiles or mosaic overviews, ensuring a full rectangular grid
     by zero-padding missing positions.
     """
-    def __init__(self, root: Union[str, Path]) -> None:
-        self.root = Path(root)
+    def __init__(self, root: Union[str, Path], io_threads: int = 4) -> None:
+        """
+        Index the tiles under *root*; a tile's channel files are then read
+        concurrently on a pool of *io_threads* threads.
+        """
+        self._root = Path(root)
         if not self.root.is_dir():
             raise FileNotFoundError(f"Root path '{self.root}' is not a directory")
 
@@ -38,110 +101,246 @@ class DataSource:
             raise ValueError("'sensor_pixel_size_um' key missing in acquisition parameters.json")
 
         # Index manual-pattern TIFF tiles by FOV
-        self.tiles_index: Dict[int, List[ChannelTile]] = {}
-        for path in self.root.rglob("*.tiff"):
-            m = FNAME_RE.match(path.name)
+        index: Dict[int, List[Tuple[str, str]]] = {}
+        # one scandir walk: names and paths stay plain strs
+        for entry in _iter_tiffs(os.fspath(self.root)):
+            # fullmatch: the pattern is anchored at both ends anyway, and the
+            # name is already known to end in .tiff
+            m = FNAME_RE.fullmatch(entry.name)
             if not m:
                 continue
             fov = int(m.group('fov'))
             suffix = m.group('suffix')
-            self.tiles_index.setdefault(fov, []).append((suffix, path))
-        if not self.tiles_index:
+            index.setdefault(fov, []).append((suffix, entry.path))
+        if not index:
             raise FileNotFoundError(f"No manual-pattern TIFF tiles found in '{self.root}'")
+        # Flatten into structure-of-arrays form: FOVs ascending, each FOV's
+        # channels contiguous and sorted by suffix, so a FOV is one slice of
+        # _suffixes / _paths and bulk lookups are a searchsorted on _fovs
+        self._fovs = np.array(sorted(index), dtype=np.int64)
+        self._suffixes: List[str] = []
+        self._paths: List[str] = []
+        starts = [0]
+        for fov in self._fovs.tolist():
+            for suffix, path in sorted(index[fov], key=itemgetter(0)):
+                self._suffixes.append(suffix)
+                self._paths.append(path)
+            starts.append(len(self._paths))
+        self._starts = np.array(starts, dtype=np.int64)
+        self._fov_slices: Dict[int, slice] = {
+            fov: slice(a, b) for fov, a, b in zip(self._fovs.tolist(), starts, starts[1:])
+        }
+
+        # tifffile releases the GIL while decoding, so threads overlap reads
+        self._io_pool = ThreadPoolExecutor(max_workers=max(1, io_threads))
+        # overview grid layouts, by level
+        self._overviews: Dict[int, Tuple[np.ndarray, int, int, np.dtype]] = {}
+
+    @property
+    def root(self) -> Path:
+        """Dataset root; fixed at construction since the index and caches derive from it."""
+        return self._root
+
+    @cached_property
+    def coords_df(self) -> pd.DataFrame:
+        """coordinates.csv for z-plane 0, parsed once and shared by all readers."""
+        coords_csv = self.root / "0" / "coordinates.csv"
+        if not coords_csv.is_file():
+            raise FileNotFoundError(f"Missing coordinates.csv at '{coords_csv}'")
+        return pd.read_csv(coords_csv)
+
+    @staticmethod
+    def _read_plane(
+        path: Union[str, Path], level: int, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        First plane of *path*, decimated by *level* (every level-th pixel).
+
+        A pyramidal TIFF whose sub-resolution matches that shape is read at
+        that resolution; anything else is decoded in full and strided (a 2-D
+        page into a per-thread scratch plane, so no full-size temporary is
+        allocated per read). With *out* the plane is written into it (and
+        *out* returned); a 2-D page at level 1 is then decoded straight into
+        *out*.
+        """
+        with tifffile.TiffFile(path) as tif:
+            series = tif.series[0]
+            i = level.bit_length() - 1  # pyramid index when level is 2**i
+            if level > 1 and level == 1 << i and i < len(series.levels):
+                h, w = series.shape[-2:]
+                sub = series.levels[i]
+                if tuple(sub.shape[-2:]) == (-(-h // level), -(-w // level)):
+                    arr = _first_plane(sub.asarray(), path)
+                    if out is None:
+                        return arr
+                    out[...] = arr
+                    return out
+            page = tif.pages[0]
+            if len(page.shape) == 2:
+                if level == 1 and out is not None:
+                    return tif.asarray(key=0, out=out)
+                if level > 1:
+                    # the full plane is only a temporary before striding, so
+                    # decode it into this thread's scratch buffer
+                    arr = tif.asarray(key=0, out=_scratch_plane(page.shape, page.dtype))
+                    if out is None:
+                        return np.ascontiguousarray(arr[::level, ::level])
+                    out[...] = arr[::level, ::level]
+                    return out
+            # If multi-channel file, decode only the first plane
+            arr = _first_plane(tif.asarray(key=0), path)
+        if out is not None:
+            out[...] = arr[::level, ::level]
+            return out
+        if level > 1:
+            arr = np.ascontiguousarray(arr[::level, ::level])
+        return arr
 
     def load_tile(self, fov: int, z: int, level: int) -> np.ndarray:
-        if level != 1:
-            raise ValueError(f"Unsupported level {level}: only level=1 is supported")
+        """
+        Load all channels of *fov* as a (C, H, W) stack.
 
-        channel_list = self.tiles_index.get(fov)
-        if not channel_list:
+        ``level`` > 1 returns every level-th pixel of each plane, i.e. shape
+        (C, ceil(H/level), ceil(W/level)), which is what TileRenderer draws.
+        """
+        if level < 1:
+            raise ValueError(f"Unsupported level {level}: levels start at 1")
+
+        sl = self._fov_slices.get(fov)
+        if sl is None:
             raise FileNotFoundError(f"No tile found for fov={fov}")
+        paths = self._paths[sl]
+
+        if len(paths) == 1:
+            return self._read_plane(paths[0], level)[np.newaxis]
+
+        # Allocate the (C, H, W) result from the first channel's header and
+        # have every channel land in its own out[i] (no np.stack copy)
+        with tifffile.TiffFile(paths[0]) as tif:
+            page = tif.pages[0]
+            shape, dtype = page.shape, page.dtype
+        if len(shape) != 2:  # multi-sample pages: read, then stack
+            arrays = list(self._io_pool.map(
+                lambda path: self._read_plane(path, level), paths
+            ))
+            return np.stack(arrays, axis=0)
+        h, w = shape
+        out = np.empty((len(paths), -(-h // level), -(-w // level)), dtype=dtype)
+        list(self._io_pool.map(
+            lambda i: self._read_plane(paths[i], level, out[i]), range(len(paths))
+        ))
+        return out
 
-        # Sort channels by suffix
-        channel_list = sorted(channel_list, key=lambda x: x[0])
-        arrays = []
-        for suffix, path in channel_list:
-            arr = tifffile.imread(path)
-            if arr.ndim not in (2, 3):
-                raise ValueError(f"Unexpected dimensions {arr.shape} for '{path}'")
-            # If multi-channel file, pick first plane
-            if arr.ndim == 3:
-                arr = arr[0]
-            arrays.append(arr)
-        return np.stack(arrays, axis=0)
-
-    def load_overview(self, level: int) -> da.Array:
+    def load_overview(
+        self, level: int, chunk_bytes: int = OVERVIEW_CHUNK_BYTES
+    ) -> da.Array:
         """
         Load a zero-padded overview mosaic at pyramid level=1 as a Dask array.
         Missing tiles are filled with black images.
+
+        The array is lazy: chunks are square blocks of whole tiles of about
+        *chunk_bytes* each (at least one tile), and a chunk's tiles are only
+        read when that chunk is computed. The grid layout is worked out once
+        per level and reused by later calls.
         """
         if level != 1:
             raise ValueError(f"Unsupported level {level}: only level=1 is supported")
+        layout = self._overviews.get(level)
+        if layout is None:
+            layout = self._overviews[level] = self._overview_layout()
+        cell_path, tile_h, tile_w, dtype = layout
+        nrows, ncols = cell_path.shape
+        per_side = math.isqrt(max(1, chunk_bytes // (tile_h * tile_w * dtype.itemsize)))
 
-        # Read coordinates.csv for z-plane 0
-        coords_csv = self.root / "0" / "coordinates.csv"
-        if not coords_csv.is_file():
-            raise FileNotFoundError(f"Missing coordinates.csv at '{coords_csv}'")
-        df = pd.read_csv(coords_csv)
-
-        # Unique sorted stage positions in mm
-        xs = np.sort(df["x (mm)"].unique())
-        ys = np.sort(df["y (mm)"].unique())
-        ncols, nrows = len(xs), len(ys)
-
-        # Determine tile shape and dtype from a sample tile
-        sample_fov, sample_list = next(iter(self.tiles_index.items()))
-        sample_path = sample_list[0][1]
-        sample_arr = tifffile.imread(sample_path)
-        if sample_arr.ndim == 3:
-            sample_arr = sample_arr[0]
-        tile_h, tile_w = sample_arr.shape
-        dtype = sample_arr.dtype
-
-        # Prepare a blank tile
-        blank = np.zeros((tile_h, tile_w), dtype=dtype)
-
-        # Build an empty mosaic
-        mosaic = np.zeros((nrows * tile_h, ncols * tile_w), dtype=dtype)
-
-        # Map fov -> grid coordinates
-        pos_map: Dict[int, Tuple[int,int]] = {}
-        for _, row in df.iterrows():
-            fov = int(row['fov'])
-            x_mm, y_mm = row['x (mm)'], row['y (mm)']
-            col = int(np.where(xs == x_mm)[0][0])
-            row_i = int(np.where(ys == y_mm)[0][0])
-            pos_map[fov] = (row_i, col)
-
-        # Fill mosaic with actual tiles or blanks
-        for r in range(nrows):
-            for c in range(ncols):
-                # find fov at (r,c)
-                fov = next((f for f,(rr,cc) in pos_map.items() if rr==r and cc==c), None)
-                if fov is not None:
-                    arr = tifffile.imread(self.tiles_index[fov][0][1])
-                    if arr.ndim == 3:
-                        arr = arr[0]
-                else:
-                    arr = blank
-                y0, x0 = r*tile_h, c*tile_w
-                mosaic[y0:y0+tile_h, x0:x0+tile_w] = arr
-
-        return da.from_array(mosaic, chunks=(tile_h, tile_w))
+        def assemble(block_info=None) -> np.ndarray:
+            (y0, y1), (x0, x1) = block_info[None]["array-location"]
+            out = np.zeros((y1 - y0, x1 - x0), dtype=dtype)
+            cells = cell_path[y0 // tile_h:y1 // tile_h, x0 // tile_w:x1 // tile_w]
+
+            def fill(job: Tuple[int, int, int]) -> None:
+                r, c, path_i = job
+                # uncompressed tiles are mapped, so the slice-assign below is
+                # the only copy (no decoded temporary per tile)
+                path = self._paths[path_i]
+                try:
+                    arr = _first_plane(tifffile.memmap(path, mode="r"), path)
+                except ValueError:  # compressed / not memory-mappable
+                    arr = _read_plane0(path)
+                out[r*tile_h:(r+1)*tile_h, c*tile_w:(c+1)*tile_w] = arr
+
+            # cells are disjoint, so the reads run concurrently on the I/O pool
+            rr, cc = np.nonzero(cells >= 0)
+            jobs = zip(rr.tolist(), cc.tolist(), cells[rr, cc].tolist())
+            list(self._io_pool.map(fill, jobs))
+            return out
+
+        def split(n: int, size: int) -> Tuple[int, ...]:
+            step = per_side * size
+            total = n * size
+            return tuple(min(step, total - i) for i in range(0, total, step))
+
+        return da.map_blocks(
+            assemble,
+            chunks=(split(nrows, tile_h), split(ncols, tile_w)),
+            dtype=dtype,
+            meta=np.empty((0, 0), dtype=dtype),
+        )
+
+    def _overview_layout(self) -> Tuple[np.ndarray, int, int, np.dtype]:
+        """
+        (nrows, ncols) grid of index into _paths of each cell's first-channel
+        file (-1 for empty cells), plus the tile height, width and dtype.
+        """
+        # coordinates.csv for z-plane 0
+        df = self.coords_df
+
+        # Grid column / row of every coordinate row, from stage positions
+        # snapped to COORD_TOL_MM so float noise cannot split a column
+        col, ncols = _grid_index(df["x (mm)"].to_numpy())
+        row_i, nrows = _grid_index(df["y (mm)"].to_numpy())
+
+        # Tile shape and dtype from the first tile's header
+        with tifffile.TiffFile(self._paths[0]) as tif:
+            page = tif.pages[0]
+            tile_h, tile_w = page.shape[-2:]
+            dtype = page.dtype
+
+        # Map each coordinate row to its FOV's slot in the index
+        fovs = df["fov"].to_numpy(np.int64)
+        slot = np.minimum(np.searchsorted(self._fovs, fovs), len(self._fovs) - 1)
+        have = self._fovs[slot] == fovs  # rows whose FOV has files
+        cell = (row_i * ncols + col)[have]
+        # the first row on a cell wins
+        cell, first = np.unique(cell, return_index=True)
+
+        cell_path = np.full(nrows * ncols, -1, dtype=np.int64)
+        cell_path[cell] = self._starts[slot[have][first]]  # first channel's file
+        return cell_path.reshape(nrows, ncols), int(tile_h), int(tile_w), np.dtype(dtype)
+
+    def content_key(self) -> str:
+        """
+        Digest of the indexed tile files and coordinates.csv (path, size and
+        mtime of each), for validating caches derived from this dataset.
+        """
+        h = hashlib.sha1()
+        for path in self._paths + [os.fspath(self.root / "0" / "coordinates.csv")]:
+            try:
+                st = os.stat(path)
+                h.update(f"{path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+            except FileNotFoundError:
+                h.update(f"{path}\0-\n".encode())
+        return h.hexdigest()
 
     def get_tile_centers(self) -> Dict[int, Tuple[float, float]]:
         """
         Read coordinates.csv and return mapping fov -> (y_center_px, x_center_px).
         Converts mm -> um -> pixels.
         """
-        coords_csv = self.root / "0" / "coordinates.csv"
-        if not coords_csv.is_file():
-            raise FileNotFoundError(f"Missing coordinates.csv at '{coords_csv}'")
-        df = pd.read_csv(coords_csv)
-        centers: Dict[int, Tuple[float, float]] = {}
-        for _, row in df.iterrows():
-            fov = int(row['fov'])
-            x_px = (float(row['x (mm)']) * 1000) / self.sensor_pixel_size_um
-            y_px = (float(row['y (mm)']) * 1000) / self.sensor_pixel_size_um
-            centers[fov] = (y_px, x_px)
+        df = self.coords_df
+        fov = df["fov"].to_numpy(np.int64)
+        x_px = df["x (mm)"].to_numpy(np.float64) * 1000 / self.sensor_pixel_size_um
+        y_px = df["y (mm)"].to_numpy(np.float64) * 1000 / self.sensor_pixel_size_um
+        centers: Dict[int, Tuple[float, float]] = dict(
+            zip(fov.tolist(), zip(y_px.tolist(), x_px.tolist()))
+        )
         return centers
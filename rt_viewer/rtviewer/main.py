@@ -21,19 +21,20 @@ def main():
     )
     parser.add_argument(
         "--threads", "-t", type=int, default=4,
-        help="Number of worker threads (stub, not yet used)"
+        help="Number of threads reading a tile's channel files"
     )
     args = parser.parse_args()
 
     root = args.dir
     max_bytes = args.mem
-    # threads currently not used in stubs
     threads = args.threads
 
     # Initialize components
-    ds = DataSource(root)
+    ds = DataSource(root, io_threads=threads)
     cache = TileCache(ds, max_bytes)
-    pyramid = PyramidBuilder(ds, [4, 8, 16])
+    pyramid = PyramidBuilder(
+        ds, [4, 8, 16], cache_path=root / ".rtviewer_cache.zarr", to_uint8=True
+    )
     adapter = MISTAdapter(root)
     renderer = TileRenderer(cache)
 
@@ -1,17 +1,124 @@
-from typing import List, Dict
+import logging
+from pathlib import Path
+from typing import List, Dict, Optional, Union
 import numpy as np
+import dask
 import dask.array as da
+import zarr
 
 from .datasource import DataSource
 
+logger = logging.getLogger(__name__)
+
+# ---------- optional SIMD block-mean backend -----------------------------------
+try:
+    import cv2
+except ImportError:  # dask coarsen fallback
+    cv2 = None  # type: ignore[assignment]
+
+# dtypes cv2.resize(INTER_AREA) handles natively
+_CV2_DTYPES = {np.dtype(t) for t in (np.uint8, np.uint16, np.int16, np.float32, np.float64)}
+
+
+def _cv2_block_mean(arr: da.Array, factor: int) -> da.Array:
+    """Per-chunk cv2.resize(INTER_AREA); chunks are made multiples of *factor*."""
+    h, w = (arr.shape[0] // factor) * factor, (arr.shape[1] // factor) * factor
+    arr = arr[:h, :w]
+    arr = arr.rechunk(tuple(max(factor, (c // factor) * factor) for c in arr.chunksize))
+
+    def shrink(block: np.ndarray) -> np.ndarray:
+        return cv2.resize(
+            block, (block.shape[1] // factor, block.shape[0] // factor),
+            interpolation=cv2.INTER_AREA,
+        )
+
+    chunks = tuple(tuple(c // factor for c in dim) for dim in arr.chunks)
+    return arr.map_blocks(shrink, chunks=chunks, dtype=arr.dtype)
+
+
+def _block_mean(arr: da.Array, factor: int) -> da.Array:
+    """
+    Mean over factor x factor blocks (excess rows/cols trimmed).
+
+    With OpenCV installed, 2-D mosaics of a dtype it supports go through
+    cv2.resize(INTER_AREA), whose integer-factor area average is exactly
+    the block mean (integers rounded). Otherwise integer mosaics are summed
+    in a widened integer type and floor-divided back to their own dtype
+    instead of going through float64; float mosaics keep np.mean in their
+    own precision.
+    """
+    if cv2 is not None and arr.ndim == 2 and arr.dtype in _CV2_DTYPES:
+        return _cv2_block_mean(arr, factor)
+    axes = {0: factor, 1: factor}
+    if not np.issubdtype(arr.dtype, np.integer):
+        return da.coarsen(np.mean, arr, axes, trim_excess=True)
+    signed = np.issubdtype(arr.dtype, np.signedinteger)
+    if arr.dtype.itemsize <= 2:
+        acc = np.int32 if signed else np.uint32
+    else:
+        acc = np.int64 if signed else np.uint64
+    summed = da.coarsen(np.sum, arr.astype(acc), axes, trim_excess=True)
+    return (summed // (factor * factor)).astype(arr.dtype)
+
+
+# Display range of uint8 levels: these percentiles of the overview map to 0 / 255
+DISPLAY_PERCENTILES = (0.5, 99.5)
+
+
+def _display_bounds(base: da.Array, max_blocks: int = 4) -> tuple:
+    """
+    DISPLAY_PERCENTILES of *base*, estimated from up to *max_blocks* chunks
+    spread along its diagonal (subsampled to ~1024 px a side) rather than
+    from a full pass over the mosaic.
+    """
+    nr, nc = base.numblocks[:2]
+    k = max(1, min(max_blocks, nr, nc))
+    rows = np.linspace(0, nr - 1, k).round().astype(int)
+    cols = np.linspace(0, nc - 1, k).round().astype(int)
+    step = max(1, max(base.chunksize) // 1024)
+    blocks = da.compute(*(base.blocks[r, c][::step, ::step] for r, c in zip(rows, cols)))
+    sample = np.concatenate([b.ravel() for b in blocks])
+    lo, hi = np.percentile(sample, DISPLAY_PERCENTILES)
+    return float(lo), float(hi)
+
+
+def _to_uint8(arr: da.Array, lo: float, hi: float) -> da.Array:
+    """Linear stretch of [lo, hi] onto 0..255, clipped, per chunk in float32."""
+    scale = np.float32(255.0 / (hi - lo)) if hi > lo else np.float32(0.0)
+    lo32 = np.float32(lo)
+
+    def stretch(block: np.ndarray) -> np.ndarray:
+        out = (block.astype(np.float32) - lo32) * scale
+        return np.clip(out, 0, 255, out=out).astype(np.uint8)
+
+    return arr.map_blocks(stretch, dtype=np.uint8)
+
+
+def _blosc_zstd() -> dict:
+    """da.to_zarr kwargs for Blosc/zstd level-1 (bit-shuffled) chunks, zarr 2 or 3."""
+    if int(zarr.__version__.split(".")[0]) >= 3:
+        from zarr.codecs import BloscCodec
+        return {"compressors": [BloscCodec(cname="zstd", clevel=1, shuffle="bitshuffle")]}
+    from numcodecs import Blosc
+    return {"compressor": Blosc(cname="zstd", clevel=1, shuffle=Blosc.BITSHUFFLE)}
+
 
 class PyramidBuilder:
     """
     Builds downsampled overview mosaics at specified zoom levels.
 
     Uses Dask's coarsen to perform block-mean downsampling on the base overview.
+    With a cache_path the levels are also written to a Zarr store, which later
+    sessions open directly while the dataset is unchanged. Levels meant only
+    for display can be contrast-stretched to uint8 (to_uint8=True).
     """
-    def __init__(self, datasource: DataSource, zoom_levels: List[int]) -> None:
+    def __init__(
+        self,
+        datasource: DataSource,
+        zoom_levels: List[int],
+        cache_path: Optional[Union[str, Path]] = None,
+        to_uint8: bool = False,
+    ) -> None:
         """
         Initialize with a DataSource and desired downsampling factors.
 
@@ -21,9 +128,19 @@ class PyramidBuilder:
             Source for the full-resolution overview (level=1).
         zoom_levels : List[int]
             Downsampling factors for each pyramid level (e.g. [4, 8, 16]).
+        cache_path : str or Path, optional
+            Zarr directory store for the built levels, keyed on
+            ``datasource.content_key()``. None disables the on-disk cache.
+        to_uint8 : bool
+            Stretch every level to uint8 between DISPLAY_PERCENTILES of the
+            overview: a quarter (float32) or half (uint16) of the memory,
+            for levels that are only ever displayed.
         """
         self.datasource = datasource
         self.zoom_levels = zoom_levels
+        self.cache_path = Path(cache_path) if cache_path is not None else None
+        self.to_uint8 = to_uint8
+        self._levels: Optional[Dict[int, da.Array]] = None
 
     def build_levels(self) -> Dict[int, da.Array]:
         """
@@ -33,7 +150,68 @@ class PyramidBuilder:
         -------
         Dict[int, dask.array.Array]
             Mapping from downsampling factor to Dask array of the overview at that level.
+            Built on the first call and returned as-is afterwards.
+        """
+        if self._levels is not None:
+            return self._levels
+
+        if self.cache_path is not None:
+            key = self.datasource.content_key()
+            if self.to_uint8:  # stored levels differ, so must the key
+                key += ":uint8"
+            levels = self._open_cached(key)
+            if levels is None:
+                levels = self._store(self._build(), key)
+        else:
+            levels = self._build()
+
+        self._levels = levels
+        return levels
+
+    def _open_cached(self, key: str) -> Optional[Dict[int, da.Array]]:
+        """The stored levels if the store exists and was built for *key*."""
+        try:
+            group = zarr.open_group(str(self.cache_path), mode="r")
+        except Exception:  # missing or unreadable store: rebuild
+            return None
+        if group.attrs.get("content_key") != key:
+            return None
+        names = {f: f"l{f}" for f in self.zoom_levels}
+        if not all(name in group for name in names.values()):
+            return None
+        return {f: da.from_zarr(str(self.cache_path), component=name) for f, name in names.items()}
+
+    def _store(self, levels: Dict[int, da.Array], key: str) -> Dict[int, da.Array]:
+        """
+        Write *levels* to a fresh store, stamp it with *key*, reopen lazily.
+
+        Chunks are Blosc/zstd level 1, about half the bytes to write and
+        read back for a negligible CPU cost. If the store cannot be written
+        (read-only or shared dataset directory, ...) the OSError is logged and
+        the lazy *levels* are returned as they are.
         """
+        path = str(self.cache_path)
+        try:
+            zarr.open_group(path, mode="w")  # drop any stale levels
+            # one compute for all levels: the overview read they share is one
+            # set of graph nodes, so each tile is decoded once, not once per level
+            compression = _blosc_zstd()
+            writes = [
+                da.to_zarr(
+                    arr, path, component=f"l{factor}", overwrite=True,
+                    compute=False, **compression,
+                )
+                for factor, arr in levels.items()
+            ]
+            dask.compute(*writes)
+            # stamped last, so an interrupted write is never taken as valid
+            zarr.open_group(path, mode="a").attrs["content_key"] = key
+        except OSError as exc:  # read-only / shared directory, disk full, ...
+            logger.warning("Could not write pyramid cache %s (%s); using uncached levels", path, exc)
+            return levels
+        return {f: da.from_zarr(path, component=f"l{f}") for f in levels}
+
+    def _build(self) -> Dict[int, da.Array]:
         # Load the full-resolution overview (level=1)
         base_overview = self.datasource.load_overview(level=1)
 
@@ -44,12 +222,8 @@ class PyramidBuilder:
                 levels[factor] = base_overview
             else:
                 # Block-mean downsampling
-                downsampled = da.coarsen(
-                    np.mean,
-                    base_overview,
-                    {0: factor, 1: factor},
-                    trim_excess=True
-                )
-                levels[factor] = downsampled
-
+                levels[factor] = _block_mean(base_overview, factor)
+        if self.to_uint8:
+            lo, hi = _display_bounds(base_overview)
+            levels = {f: _to_uint8(arr, lo, hi) for f, arr in levels.items()}
         return levels
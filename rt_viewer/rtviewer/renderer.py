@@ -2,6 +2,28 @@ import numpy as np
 import pandas as pd
 from .cache import TileCache
 
+# ---------- optional JIT blit --------------------------------------------------
+try:
+    from numba import njit, prange
+except ImportError:  # per-tile slice-assign fallback
+    njit = None
+
+
+if njit is not None:
+    @njit(cache=True, nogil=True, parallel=True)
+    def _blit_all(composite, tiles, ys, xs):  # pragma: no cover - compiled
+        # parallel over canvas rows, not tiles: neighbouring tiles overlap,
+        # and within a row the tiles are still pasted in order, so the later
+        # tile wins exactly as in the Python loop
+        h, w = tiles.shape[1], tiles.shape[2]
+        for y in prange(composite.shape[0]):
+            for i in range(tiles.shape[0]):
+                r = y - ys[i]
+                if 0 <= r < h:
+                    composite[y, xs[i]:xs[i] + w] = tiles[i, r]
+else:
+    _blit_all = None
+
 
 class TileRenderer:
     """
@@ -30,7 +52,7 @@ class TileRenderer:
         offsets : pd.DataFrame
             DataFrame with columns ['fov', 'dx', 'dy'] containing pixel offsets at full resolution.
         level : int
-            Downsampling factor (must divide tile dimensions).
+            Downsampling factor; tiles are fetched from the cache at this level.
 
         Returns
         -------
@@ -40,42 +62,51 @@ class TileRenderer:
         if offsets.empty:
             return np.zeros((1, 1), dtype=np.uint8)
 
-        # Determine tile dimensions from first tile
+        # Tiles come from the cache already at `level` (every level-th pixel),
+        # so the first one gives the downsampled tile size directly
         first_fov = int(offsets['fov'].iloc[0])
-        tile_full = self.cache.get(first_fov, self.z, 1)
+        tile0 = self.cache.get(first_fov, self.z, level)
         # If multi-channel, select first channel
-        arr0 = tile_full[0] if tile_full.ndim == 3 else tile_full
-        H, W = arr0.shape
-
-        # Compute downsampled tile size (ceil to cover full tile)
-        Hs = int(np.ceil(H / level))
-        Ws = int(np.ceil(W / level))
+        arr0 = tile0[0] if tile0.ndim == 3 else tile0
+        Hs, Ws = arr0.shape
 
         # Convert full-resolution offsets to downsampled grid coordinates
-        xs = (offsets['dx'] / level).astype(int)
-        ys = (offsets['dy'] / level).astype(int)
+        # (truncated toward zero), as plain arrays so the paste loop below
+        # does no pandas boxing
+        fovs = offsets['fov'].to_numpy(np.int64).tolist()
+        xs = (offsets['dx'].to_numpy(np.float64) / level).astype(np.int64)
+        ys = (offsets['dy'].to_numpy(np.float64) / level).astype(np.int64)
 
         # Determine output mosaic dimensions
         min_x, min_y = xs.min(), ys.min()
-        max_x, max_y = xs.max(), ys.max()
-        out_h = (max_y - min_y) + Hs
-        out_w = (max_x - min_x) + Ws
+        out_h = int(ys.max() - min_y) + Hs
+        out_w = int(xs.max() - min_x) + Ws
 
         # Initialize composite canvas
         composite = np.zeros((out_h, out_w), dtype=arr0.dtype)
 
+        # Start every tile loading before pasting, so misses overlap each
+        # other and the pastes instead of running one after another
+        for fov in fovs[1:]:
+            self.cache.prefetch(fov, self.z, level)
+
         # Paste each downsampled tile into the canvas
-        for _, row in offsets.iterrows():
-            fov = int(row['fov'])
-            dx_ds = int(row['dx'] / level) - min_x
-            dy_ds = int(row['dy'] / level) - min_y
-
-            tile_full = self.cache.get(fov, self.z, 1)
-            arr = tile_full[0] if tile_full.ndim == 3 else tile_full
-            # Simple downsample by strided sampling
-            arr_ds = arr[::level, ::level]
-            h_ds, w_ds = arr_ds.shape
+        dxs = xs - min_x
+        dys = ys - min_y
+        planes = []
+        for fov in fovs:
+            tile = self.cache.get(fov, self.z, level)
+            planes.append(tile[0] if tile.ndim == 3 else tile)
 
+        if _blit_all is not None and all(
+            p.shape == (Hs, Ws) and p.dtype == composite.dtype for p in planes
+        ):
+            # one compiled call instead of a NumPy dispatch per tile
+            _blit_all(composite, np.stack(planes), dys, dxs)
+            return composite
+
+        for arr_ds, dx_ds, dy_ds in zip(planes, dxs.tolist(), dys.tolist()):
+            h_ds, w_ds = arr_ds.shape
             composite[dy_ds:dy_ds + h_ds, dx_ds:dx_ds + w_ds] = arr_ds
 
         return composite
@@ -4,15 +4,86 @@ mist_adapter.py — Adapter for headless, in-memory MIST stitching
 using exactly the same parameters as mist_stage.py.
 """
 
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 from pathlib import Path
+import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 import jpype
 from jpype import JArray, JByte, JShort, JFloat, JClass
 
 
+# Classpath scans, in-process and persisted across runs; each entry is keyed
+# on the mtime of every directory under fiji_dir, which changes whenever a
+# JAR is added to or removed from that directory (jars/bio-formats/, ...)
+_CLASSPATH_CACHE: Dict[str, Tuple[list, str]] = {}
+_CLASSPATH_FILE = Path(
+    os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")
+) / "rtviewer" / "fiji_classpath.json"
+
+
+def _fiji_stamp(fiji_dir: Path) -> list:
+    """[relative path, mtime_ns] of fiji_dir and every directory below it, sorted."""
+    stamp = []
+    stack = [os.fspath(fiji_dir)]
+    while stack:
+        d = stack.pop()
+        stamp.append([os.path.relpath(d, fiji_dir), os.stat(d).st_mtime_ns])
+        with os.scandir(d) as it:
+            stack.extend(e.path for e in it if e.is_dir(follow_symlinks=False))
+    stamp.sort()
+    return stamp
+
+
+def _fiji_classpath(fiji_dir: Path) -> str:
+    """
+    Every .jar under *fiji_dir*, joined with os.pathsep.
+
+    The os.walk over Fiji.app (thousands of files) is only redone when
+    the directory stamp changes.
+    """
+    key = str(fiji_dir)
+    stamp = _fiji_stamp(fiji_dir)
+    hit = _CLASSPATH_CACHE.get(key)
+    if hit is None:
+        try:
+            stored = json.loads(_CLASSPATH_FILE.read_text()).get(key)
+            if stored is not None:
+                hit = (stored["stamp"], stored["classpath"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+
+    # Recursively find all jars under the given directory
+    jars = []
+    for root, _, files in os.walk(fiji_dir):
+        for fname in files:
+            if fname.lower().endswith(".jar"):
+                jars.append(str(Path(root) / fname))
+    if not jars:
+        raise RuntimeError(f"No .jar files found under '{fiji_dir}'")
+    classpath = os.pathsep.join(jars)
+
+    _CLASSPATH_CACHE[key] = (stamp, classpath)
+    try:
+        try:
+            stored = json.loads(_CLASSPATH_FILE.read_text())
+        except (OSError, ValueError):
+            stored = {}
+        stored[key] = {"stamp": stamp, "classpath": classpath}
+        _CLASSPATH_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = _CLASSPATH_FILE.with_suffix(".tmp")
+        tmp.write_text(json.dumps(stored))
+        tmp.replace(_CLASSPATH_FILE)
+    except OSError:  # read-only home: the in-process cache still applies
+        pass
+    return classpath
+
+
 class MISTAdapter:
     """
     Adapter for headless, in-memory MIST stitching.
@@ -42,19 +113,24 @@ class MISTAdapter:
         fiji_dir = Path(fiji_dir).expanduser().resolve()
 
         if not jpype.isJVMStarted():
-            # Recursively find all jars under the given directory
-            jars = []
-            for root, _, files in os.walk(fiji_dir):
-                for fname in files:
-                    if fname.lower().endswith(".jar"):
-                        jars.append(str(Path(root) / fname))
-            if not jars:
-                raise RuntimeError(f"No .jar files found under '{fiji_dir}'")
-            classpath = os.pathsep.join(jars)
+            classpath = _fiji_classpath(fiji_dir)
             jpype.startJVM("-ea", f"-Djava.class.path={classpath}")
 
         self._import_java_classes()
 
+        # Processors (with their pixel arrays) from earlier align_tiles
+        # calls, by (element type, width, height); a grid of the same size
+        # refills them instead of allocating on the Java heap again
+        self._proc_pool: Dict[tuple, list] = {}
+        self._pool_lock = threading.Lock()
+        # configured StitchingAppParams beans, by (num_rows, num_cols, save_plan)
+        self._params: Dict[Tuple[int, int, bool], object] = {}
+        # tile (height, width) whose FFTW plan this process has already saved
+        self._saved_plans: set = set()
+        # tiles are wrapped concurrently: JPype drops the GIL during the
+        # bulk copy into Java, and its threads attach to the JVM on demand
+        self._wrap_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+
     def _import_java_classes(self) -> None:
         # Core MIST classes
         self.StitchingAppParams = JClass("gov.nist.isg.mist.gui.params.StitchingAppParams")
@@ -90,21 +166,75 @@ class MISTAdapter:
         for f in (self._pixels, self._width, self._height, self._loaded):
             f.setAccessible(True)
 
-    def align_tiles(
-        self,
-        tiles: List[np.ndarray],
-        num_rows: int,
-        num_cols: int,
-        overlap_pct: float = 20.0,
-        downsample: int = 2,
-    ) -> pd.DataFrame:
+    def _to_processor(self, img: np.ndarray) -> tuple:
         """
-        Align a regular grid of numpy tiles via MIST, using exactly the same
-        bean parameters as mist_stage.py.
+        Wrap a tile as an ImageJ processor, as ``(pool key, processor, pixels)``.
 
-        Returns a DataFrame with columns ['tile_index', 'dx', 'dy'].
+        Pixels go to Java in one bulk copy: JPype fills a Java array straight
+        from a NumPy buffer whose dtype matches the element type, so the
+        tile is reinterpreted (uint8 -> int8, uint16 -> int16) rather than
+        converted to a Python list. A pooled processor of the same type and
+        size is refilled in place when one is free.
+        """
+        if img.ndim == 3:  # (C, H, W) cache tile: register on channel 0
+            img = img[0]
+        h, w = img.shape
+        img = np.ascontiguousarray(img)
+        dtype = img.dtype
+
+        if dtype == np.uint8:
+            # 0–255 reinterpreted as signed int8 for Java byte[]
+            return self._fill(JByte, self.ByteProcessor, w, h, img.view(np.int8))
+
+        if dtype == np.uint16:
+            # ShortProcessor treats short[] as unsigned
+            return self._fill(JShort, self.ShortProcessor, w, h, img.view(np.int16))
+
+        if np.issubdtype(dtype, np.floating):
+            return self._fill(
+                JFloat, self.FloatProcessor, w, h, img.astype(np.float32, copy=False)
+            )
+
+        # normalize any other type into 0–255, then into signed byte; one
+        # float32 multiply straight into the uint8 result (no float64 temp)
+        peak = img.max()
+        scale = np.float32(255.0 / peak) if peak else np.float32(0.0)
+        norm8 = np.empty(img.shape, dtype=np.uint8)
+        np.multiply(img, scale, out=norm8, casting="unsafe")
+        return self._fill(JByte, self.ByteProcessor, w, h, norm8.view(np.int8))
+
+    def _fill(self, jtype, proc_cls, w: int, h: int, pixels: np.ndarray) -> tuple:
+        """Pooled (or new) processor of *proc_cls* holding *pixels*."""
+        key = (jtype, w, h)
+        with self._pool_lock:
+            free = self._proc_pool.get(key)
+            entry = free.pop() if free else None
+        if entry is None:
+            jarr = JArray(jtype)(pixels.ravel())
+            return key, proc_cls(w, h, jarr, None), jarr
+        iproc, jarr = entry
+        jarr[:] = pixels.ravel()  # bulk copy into the existing Java array
+        # min/max were computed from the previous tile at construction;
+        # recompute so the processor matches a freshly built one
+        iproc.resetMinAndMax()
+        return key, iproc, jarr
+
+    def _release(self, wrapped) -> None:
+        """Return processors from _to_processor to the pool."""
+        with self._pool_lock:
+            for key, iproc, jarr in wrapped:
+                self._proc_pool.setdefault(key, []).append((iproc, jarr))
+
+    def _build_params(self, num_rows: int, num_cols: int, save_plan: bool = True):
+        """
+        StitchingAppParams bean with exactly the parameters of mist_stage.py
+        for a *num_rows* x *num_cols* grid; *save_plan* False keeps MIST
+        from rewriting an FFTW plan file it has already written.
+
+        Only the grid size varies between calls, so align_tiles keeps one
+        bean per shape instead of making these ~60 bridge calls every time;
+        a bean is never changed after this, so concurrent runs can share it.
         """
-        # 1. build fully-specified params bean
         jp = self.StitchingAppParams()
         ip = jp.getInputParams()
         op = jp.getOutputParams()
@@ -158,7 +288,7 @@ class MISTAdapter:
         adv.setUseBioFormats(False)
         adv.setEnableCudaExceptions(False)
         adv.setFftwPlanType(self.FftwPlanType.PATIENT)
-        adv.setSaveFFTWPlan(True)
+        adv.setSaveFFTWPlan(save_plan)
         adv.setLoadFFTWPlan(True)
         adv.setFftwLibraryName("libfftw3")
         adv.setFftwLibraryFileName("libfftw3.dylib")
@@ -168,60 +298,89 @@ class MISTAdapter:
         # ── LOGGING ────────────────────────────────────────────────────────────
         lg.setLogLevel(self.LogType.MANDATORY)
         lg.setDebugLevel(self.DebugType.NONE)
+        return jp
 
-        # 2. wrap numpy arrays as ImageJ processors
-        tile_images = {}
-        for idx, img in enumerate(tiles):
-            h, w = img.shape[:2]
-            dtype = img.dtype
-
-        if dtype == np.uint8:
-            # map 0–255 → signed int8 for Java byte[]
-            signed = img.astype(np.int8)
-            arr    = JArray(JByte)(signed.ravel().tolist())
-            iproc  = self.ByteProcessor(w, h, arr, None)
-
-        elif dtype == np.uint16:
-            arr   = JArray(JShort)(img.ravel().tolist())
-            iproc = self.ShortProcessor(w, h, arr, None)
+    def align_tiles(
+        self,
+        tiles: List[np.ndarray],
+        num_rows: int,
+        num_cols: int,
+        overlap_pct: float = 20.0,
+        downsample: int = 2,
+    ) -> pd.DataFrame:
+        """
+        Align a regular grid of numpy tiles via MIST, using exactly the same
+        bean parameters as mist_stage.py.
 
-        elif np.issubdtype(dtype, np.floating):
-            arr   = JArray(JFloat)(img.astype("float32").ravel().tolist())
-            iproc = self.FloatProcessor(w, h, arr, None)
+        Returns a DataFrame with columns ['tile_index', 'dx', 'dy'].
+        """
+        # 0. nothing to register against: zero offsets, without touching the
+        # JVM (no grid, no FFTW plan load)
+        if len(tiles) < 2:
+            n = len(tiles)
+            return pd.DataFrame({
+                "tile_index": np.arange(n), "dx": np.zeros(n), "dy": np.zeros(n),
+            })
 
-        else:
-            # normalize any other type into 0–255, then into signed byte
-            norm8  = (img / img.max() * 255).astype("uint8")
-            signed = norm8.astype(np.int8)
-            arr    = JArray(JByte)(signed.ravel().tolist())
-            iproc  = self.ByteProcessor(w, h, arr, None)
+        # 1. fully-specified params bean, configured once per grid shape.
+        # The PATIENT plan for a tile shape is measured and saved on the
+        # first run only; later runs just load it
+        plan_shape = tuple(tiles[0].shape[-2:])
+        save_plan = plan_shape not in self._saved_plans
+        key = (num_rows, num_cols, save_plan)
+        jp = self._params.get(key)
+        if jp is None:
+            jp = self._params[key] = self._build_params(num_rows, num_cols, save_plan)
 
-            tile_images[idx] = iproc
+        # 2. wrap numpy arrays as ImageJ processors
+        wrapped = list(self._wrap_pool.map(self._to_processor, tiles))
+        tile_images = {idx: iproc for idx, (_, iproc, _) in enumerate(wrapped)}
+        # (height, width) known on this side, so no getWidth/getHeight calls
+        tile_hw = [img.shape[-2:] for img in tiles]
 
         # 3. build the TileGrid and inject tiles
         total_tiles = num_rows * num_cols
         grid = self.TileGrid(jp, total_tiles, self.ImageTileClass)
+        # one placeholder File for all tiles (java.io.File is immutable)
+        in_memory = self.File("in_memory")
         for idx, iproc in tile_images.items():
             r, c = divmod(idx, num_cols)
-            tile = self.ImageTileClass(self.File("in_memory"), r, c)
+            h, w = tile_hw[idx]
+            tile = self.ImageTileClass(in_memory, r, c)
             self._pixels.set(tile, iproc)
-            self._width.setInt(tile, iproc.getWidth())
-            self._height.setInt(tile, iproc.getHeight())
+            self._width.setInt(tile, int(w))
+            self._height.setInt(tile, int(h))
             self._loaded.setBoolean(tile, True)
             grid.setTile(r, c, tile)
 
-        # 4. run MIST headless
+        # 4. run MIST headless; the grid is done with the processors after
+        # this, so they go back to the pool either way
         self.MISTMain.runHeadless = True
-        if not self.MISTMain.runStitching(jp, grid):
+        try:
+            ok = self.MISTMain.runStitching(jp, grid)
+        finally:
+            self._release(wrapped)
+        if not ok:
             raise RuntimeError("MIST stitching failed")
+        self._saved_plans.add(plan_shape)
 
-        # 5. extract translation results
-        results = []
-        for idx in sorted(tile_images):
-            r, c = divmod(idx, num_cols)
-            t = grid.getTile(r, c)
-            dx = getattr(t, "getXTranslation", lambda: 0)()
-            dy = getattr(t, "getYTranslation", lambda: 0)()
-            results.append({"tile_index": idx, "dx": dx, "dy": dy})
+        # 5. extract translation results; whether the tile class has the
+        # getters is probed once, not per tile and axis
+        n = len(tiles)
+        dxs = np.zeros(n)
+        dys = np.zeros(n)
+        sample = grid.getTile(0, 0)
+        has_x = hasattr(sample, "getXTranslation")
+        has_y = hasattr(sample, "getYTranslation")
+        if has_x or has_y:
+            for idx in range(n):
+                t = grid.getTile(*divmod(idx, num_cols))
+                if has_x:
+                    dxs[idx] = t.getXTranslation()
+                if has_y:
+                    dys[idx] = t.getYTranslation()
 
-        return pd.DataFrame(results)
+        # copy=False: the columns wrap these arrays rather than copying them
+        return pd.DataFrame(
+            {"tile_index": np.arange(n), "dx": dxs, "dy": dys}, copy=False
+        )
@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Optional
 import dask.array as da
 import napari
 
@@ -7,9 +7,17 @@ class VolumeRenderer:
     """
     Renders 3D volume stacks in Napari.
     """
+    def __init__(self) -> None:
+        # the layer added by the first render_volume call, updated in place
+        # by later calls instead of stacking up new layers
+        self._layer: Optional[napari.layers.Image] = None
+
     def render_volume(self, viewer: napari.Viewer, pyramid: Dict[int, da.Array]) -> None:
         """
-        Render the lowest-resolution 3D volume from the pyramid.
+        Render the 3D volume pyramid as one multiscale layer.
+
+        Napari picks the level to draw from the viewport, so only that
+        level's chunks are read; at first that is the lowest resolution.
 
         Parameters
         ----------
@@ -19,13 +27,15 @@ class VolumeRenderer:
             Mapping from downsampling factor to 3D volume arrays.
         """
         # TODO: replace with NVIDIA IndeX integration
-        # Select the lowest-resolution level (largest downsampling factor)
-        level = max(pyramid.keys())
-        volume = pyramid[level]
-        # Add as an image layer for now (stubbed 3D stack display)
-        viewer.add_image(
-            volume,
-            name=f"volume_level_{level}",
-            multiscale=False,
-            scale=[level] * volume.ndim,
+        # Finest level first, as napari's multiscale expects
+        levels = sorted(pyramid)
+        arrays = [pyramid[level] for level in levels]
+        if self._layer is not None and self._layer in viewer.layers:
+            self._layer.data = arrays
+            return
+        self._layer = viewer.add_image(
+            arrays,
+            name="volume",
+            multiscale=True,
+            scale=[levels[0]] * arrays[0].ndim,
         )
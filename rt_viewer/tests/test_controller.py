@@ -59,12 +59,16 @@ class FakeDataSource(DataSource):
         # One tile centered at (100,100)
         return {1: (100.0, 100.0)}
 
+# One shared read-only tile, so lookups allocate nothing
+_CONST_TILE = np.ones((20,20), dtype=np.uint8)
+_CONST_TILE.flags.writeable = False
+
 # Fake TileCache returning a constant tile image
 class FakeCache(TileCache):
     def __init__(self): pass
     def get(self, fov, z, level):
-        # Return a small constant array for any tile
-        return np.ones((20,20), dtype=np.uint8)
+        # Return the same small constant array for any tile
+        return _CONST_TILE
 
 # Fake MISTAdapter returning a known offset DataFrame
 class FakeAdapter(MISTAdapter):
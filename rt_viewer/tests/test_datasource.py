@@ -14,7 +14,10 @@ from rtviewer.datasource import DataSource, FNAME_RE
 def make_tile(path: Path, value: int, shape=(2, 3)):
     """Write a single‐channel TIFF filled with `value`."""
     arr = np.full(shape, fill_value=value, dtype=np.uint16)
-    tifffile.imwrite(path, arr)
+    # plain uncompressed page, no shaped/ImageJ metadata to generate
+    tifffile.imwrite(
+        path, arr, photometric="minisblack", compression=None, metadata=None
+    )
 
 
 @pytest.fixture
@@ -84,11 +87,21 @@ def test_load_tile_errors_on_missing_tile(tmp_dataset):
         ds.load_tile(fov=99, z=0, level=1)
 
 
+def test_load_tile_downsampled_level(tmp_dataset):
+    root, _, shape = tmp_dataset
+    ds = DataSource(root)
+    arr = ds.load_tile(fov=3, z=0, level=2)
+    # every 2nd pixel: ceil(2/2) x ceil(3/2)
+    assert arr.shape == (2, 1, 2)
+    np.testing.assert_array_equal(arr[0], np.full((1, 2), 3, dtype=np.uint16))
+    np.testing.assert_array_equal(arr[1], np.full((1, 2), 30, dtype=np.uint16))
+
+
 def test_load_tile_errors_on_unsupported_level(tmp_dataset):
     root, _, _ = tmp_dataset
     ds = DataSource(root)
     with pytest.raises(ValueError):
-        ds.load_tile(fov=1, z=0, level=2)
+        ds.load_tile(fov=1, z=0, level=0)
 
 
 def test_load_tile_errors_on_corrupted_tiff(tmp_dataset, tmp_path, monkeypatch):
@@ -61,3 +61,88 @@ def test_build_levels_downsample_factor4():
     down = levels[4].compute()
     expected = np.array([[base.mean()]], dtype=float)
     np.testing.assert_allclose(down, expected)
+
+
+def test_build_levels_is_cached():
+    base = np.arange(16, dtype=float).reshape(4, 4)
+    ds = StubDataSource(base)
+    pb = PyramidBuilder(datasource=ds, zoom_levels=[2])
+    # second call returns the same mapping without rebuilding
+    assert pb.build_levels() is pb.build_levels()
+
+
+def test_build_levels_integer_overview_keeps_dtype():
+    # block sums divisible by 4, so the mean is exact whether the backend
+    # rounds or floors
+    base = np.array([
+        [1, 3, 2, 6],
+        [5, 7, 4, 8],
+        [9, 11, 65535, 65535],
+        [13, 15, 65535, 65535],
+    ], dtype=np.uint16)
+    ds = StubDataSource(base)
+    pb = PyramidBuilder(datasource=ds, zoom_levels=[2])
+    down = pb.build_levels()[2].compute()
+    # no overflow in the 65535 block
+    assert down.dtype == np.uint16
+    expected = np.array([[4, 5], [12, 65535]], dtype=np.uint16)
+    np.testing.assert_array_equal(down, expected)
+
+
+def test_build_levels_to_uint8_stretches_display_range():
+    base = np.arange(64, dtype=np.uint16).reshape(8, 8) * 1000
+    ds = StubDataSource(base)
+    levels = PyramidBuilder(ds, [1, 2], to_uint8=True).build_levels()
+    full, down = levels[1].compute(), levels[2].compute()
+    assert full.dtype == down.dtype == np.uint8
+    assert down.shape == (4, 4)
+    # percentile bounds clip the extremes to the ends of the range
+    assert full[0, 0] == 0 and full[-1, -1] == 255
+    # the stretch keeps the ordering
+    assert np.all(np.diff(full.ravel().astype(int)) >= 0)
+
+
+class KeyedStubDataSource(StubDataSource):
+    def __init__(self, base_array: np.ndarray, key: str):
+        super().__init__(base_array)
+        self.key = key
+        self.loads = 0
+
+    def load_overview(self, level: int) -> da.Array:
+        self.loads += 1
+        return super().load_overview(level)
+
+    def content_key(self) -> str:
+        return self.key
+
+
+def test_build_levels_reuses_zarr_cache(tmp_path):
+    base = np.arange(16, dtype=np.float64).reshape(4, 4)
+    store = tmp_path / "levels.zarr"
+
+    first = KeyedStubDataSource(base, key="a")
+    levels = PyramidBuilder(first, [1, 2], cache_path=store).build_levels()
+    np.testing.assert_allclose(levels[2].compute(), [[2.5, 4.5], [10.5, 12.5]])
+    assert first.loads == 1
+
+    # same key: served from the store, the overview is never assembled
+    again = KeyedStubDataSource(base, key="a")
+    levels = PyramidBuilder(again, [1, 2], cache_path=store).build_levels()
+    np.testing.assert_array_equal(levels[1].compute(), base)
+    assert again.loads == 0
+
+    # changed dataset: rebuilt
+    changed = KeyedStubDataSource(base + 1, key="b")
+    levels = PyramidBuilder(changed, [1, 2], cache_path=store).build_levels()
+    np.testing.assert_array_equal(levels[1].compute(), base + 1)
+    assert changed.loads == 1
+
+
+def test_build_levels_falls_back_when_cache_unwritable(tmp_path):
+    base = np.arange(16, dtype=np.float64).reshape(4, 4)
+    blocker = tmp_path / "not_a_dir"
+    blocker.write_text("")  # the store's parent is a file: every write fails
+
+    ds = KeyedStubDataSource(base, key="a")
+    levels = PyramidBuilder(ds, [1, 2], cache_path=blocker / "levels.zarr").build_levels()
+    np.testing.assert_allclose(levels[2].compute(), [[2.5, 4.5], [10.5, 12.5]])
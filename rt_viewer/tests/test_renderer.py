@@ -14,7 +14,11 @@ class FakeCache:
         self.data = data
 
     def get(self, fov, z, level):
-        return self.data[fov]
+        # like TileCache: level > 1 is every level-th pixel
+        return self.data[fov][..., ::level, ::level]
+
+    def prefetch(self, fov, z, level):
+        pass
 
 
 def test_composite_two_tiles_horizontal():
@@ -9,13 +9,21 @@ As you pan and zoom in the viewer, this script will:
 """
 
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import numpy as np
+import dask
+import dask.array as da
 import tifffile
 import napari
+from qtpy.QtCore import QTimer
 from rtviewer.stitcher_adapter import MISTAdapter
 
 
+TILE_RE = re.compile(r"^manual_r(?P<r>\d+)_c(?P<c>\d+)_")
+
+
 class TileDataSource:
     """
     Simple datasource that loads tiles from disk.
@@ -26,33 +34,57 @@ class TileDataSource:
         self.root = Path(root)
         self.num_rows = num_rows
         self.num_cols = num_cols
+        # resolve every tile's path in one directory scan, not a glob per load
+        self._paths: dict[tuple[int, int], Path] = {}
+        for path in sorted(self.root.glob("manual_r*_c*_*.tif")):
+            m = TILE_RE.match(path.name)
+            if m:
+                self._paths.setdefault((int(m["r"]), int(m["c"])), path)
+        self._pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
         # preload one tile to get shape
-        sample = next(self.root.glob("manual_r0_c0_*.tif"))
-        self.tile_shape = tifffile.imread(str(sample)).shape[:2]
+        self.tile_shape = self.load_tile(0, 0).shape[:2]
 
     def load_tile(self, row: int, col: int) -> np.ndarray:
-        path = next(self.root.glob(f"manual_r{row}_c{col}_*.tif"))
-        return tifffile.imread(str(path))
+        path = self._paths.get((row, col))
+        if path is None:
+            raise FileNotFoundError(f"No tile manual_r{row}_c{col}_*.tif in '{self.root}'")
+        # uncompressed tiles are mapped (the page cache serves repeat reads);
+        # compressed ones are decoded as before
+        try:
+            return tifffile.memmap(str(path), mode="r")
+        except ValueError:
+            return tifffile.imread(str(path))
 
     def tiles_in_view(self, viewer: napari.Viewer) -> tuple[list[np.ndarray], int, int]:
         """
         Return all tiles intersecting the current view rectangle.
         For simplicity, this example always returns all tiles.
+        Tiles are read concurrently (tifffile decodes without the GIL).
         """
-        tiles = []
-        for r in range(self.num_rows):
-            for c in range(self.num_cols):
-                tiles.append(self.load_tile(r, c))
+        cells = [(r, c) for r in range(self.num_rows) for c in range(self.num_cols)]
+        tiles = list(self._pool.map(lambda rc: self.load_tile(*rc), cells))
         return tiles, self.num_rows, self.num_cols
 
 
+def tile_origins(
+    shifts: np.ndarray, num_cols: int, tile_shape: tuple[int, int]
+) -> tuple[np.ndarray, np.ndarray]:
+    """Top-left (y0, x0) of every tile in the mosaic, as int arrays."""
+    th, tw = tile_shape
+    min_dx, min_dy = shifts.min(axis=0)
+    rows, cols = np.divmod(np.arange(len(shifts)), num_cols)
+    y0 = rows * th + (shifts[:, 1] - min_dy).astype(np.int64)
+    x0 = cols * tw + (shifts[:, 0] - min_dx).astype(np.int64)
+    return y0, x0
+
+
 def compose_mosaic(
     tiles: list[np.ndarray],
     shifts: np.ndarray,
     num_rows: int,
     num_cols: int,
     tile_shape: tuple[int, int],
-) -> np.ndarray:
+) -> tuple[np.ndarray, float, float]:
     """
     Compose a mosaic given raw tiles and their dx/dy shifts.
 
@@ -68,21 +100,74 @@ def compose_mosaic(
     Returns
     -------
     mosaic : np.ndarray
+    lo, hi : float
+        Mosaic minimum and maximum, tracked per tile while pasting (the
+        zero border counts), so callers need no extra scans for contrast.
     """
     th, tw = tile_shape
-    # estimate mosaic size
-    total_h = num_rows * th + int(np.ptp(shifts[:,1])) + 10
-    total_w = num_cols * tw + int(np.ptp(shifts[:,0])) + 10
+    # estimate mosaic size from the shift span on each axis
+    span_dx, span_dy = np.ptp(shifts, axis=0)
+    total_h = num_rows * th + int(span_dy) + 10
+    total_w = num_cols * tw + int(span_dx) + 10
     mosaic = np.zeros((total_h, total_w), dtype=tiles[0].dtype)
 
-    for idx, img in enumerate(tiles):
-        r, c = divmod(idx, num_cols)
-        dx, dy = shifts[idx]
-        y0 = r * th + int(dy - shifts[:,1].min())
-        x0 = c * tw + int(dx - shifts[:,0].min())
-        mosaic[y0 : y0 + th, x0 : x0 + tw] = img
+    y0, x0 = tile_origins(shifts, num_cols, tile_shape)
+    lo = hi = 0  # the padding border is always background
+    for img, y, x in zip(tiles, y0.tolist(), x0.tolist()):
+        mosaic[y : y + th, x : x + tw] = img
+        lo = min(lo, img.min())
+        hi = max(hi, img.max())
 
-    return mosaic
+    return mosaic, float(lo), float(hi)
+
+
+def update_mosaic(
+    mosaic: np.ndarray,
+    tiles: list[np.ndarray],
+    prev_shifts: np.ndarray,
+    shifts: np.ndarray,
+    num_cols: int,
+    tile_shape: tuple[int, int],
+) -> bool:
+    """
+    Bring *mosaic* (composed from *prev_shifts*) up to date with *shifts*
+    by recomposing only the areas the moved tiles left or entered.
+
+    Each such area is cleared and every tile overlapping it is pasted
+    again in tile order, clipped to the area, so inside it the result is
+    exactly what compose_mosaic draws and nothing outside it is touched.
+
+    Returns False, leaving *mosaic* untouched, when the layout itself
+    changed (tile count, or the minimum or span of the shifts) and the
+    mosaic has to be composed afresh.
+    """
+    if (
+        prev_shifts.shape != shifts.shape
+        or (prev_shifts.min(axis=0) != shifts.min(axis=0)).any()
+        or (np.ptp(prev_shifts, axis=0) != np.ptp(shifts, axis=0)).any()
+    ):
+        return False
+    moved = np.flatnonzero((prev_shifts != shifts).any(axis=1))
+    if moved.size == 0:
+        return True
+
+    th, tw = tile_shape
+    old_y, old_x = tile_origins(prev_shifts, num_cols, tile_shape)
+    y0, x0 = tile_origins(shifts, num_cols, tile_shape)
+    # areas that change: where the moved tiles were, and where they are
+    dirty_y = np.concatenate([old_y[moved], y0[moved]]).tolist()
+    dirty_x = np.concatenate([old_x[moved], x0[moved]]).tolist()
+    for dy, dx in zip(dirty_y, dirty_x):
+        mosaic[dy : dy + th, dx : dx + tw] = 0
+        overlapping = np.flatnonzero(
+            (np.abs(y0 - dy) < th) & (np.abs(x0 - dx) < tw)
+        ).tolist()
+        for i in overlapping:
+            ty, tx = int(y0[i]), int(x0[i])
+            ya, yb = max(ty, dy), min(ty, dy) + th
+            xa, xb = max(tx, dx), min(tx, dx) + tw
+            mosaic[ya:yb, xa:xb] = tiles[i][ya - ty : yb - ty, xa - tx : xb - tx]
+    return True
 
 
 def main():
@@ -97,9 +182,13 @@ def main():
 
     # Start Napari viewer
     viewer = napari.Viewer(title="MISTAdapter Live Stitch Test")
-    # display raw overview (optional)
-    overview = np.block([
-        [ds.load_tile(r, c) for c in range(num_cols)]
+    # display raw overview (optional); a lazy block grid, so napari only
+    # reads the tiles it draws and Dask reads them in parallel
+    sample = ds.load_tile(0, 0)
+    load = dask.delayed(ds.load_tile, pure=True)
+    overview = da.block([
+        [da.from_delayed(load(r, c), sample.shape, sample.dtype)
+         for c in range(num_cols)]
         for r in range(num_rows)
     ])
     viewer.add_image(overview, name="raw_overview", blending="additive", opacity=0.3)
@@ -109,21 +198,36 @@ def main():
         np.zeros((1,1)), name="stitched", blending="opaque"
     )
 
+    state = {"shifts": None, "mosaic": None}
+
     def update_stitch(event=None):
         # 1. load visible tiles (here: all)
         tiles, rows, cols = ds.tiles_in_view(viewer)
         # 2. align via MISTAdapter
         df = adapter.align_tiles(tiles, rows, cols)
         shifts = df.sort_values("tile_index")[["dx", "dy"]].to_numpy()
-        # 3. compose mosaic
-        mosaic = compose_mosaic(tiles, shifts, rows, cols, ds.tile_shape)
+        # 3. redraw only the tiles that moved, when the layout allows it
+        if state["mosaic"] is not None and update_mosaic(
+            state["mosaic"], tiles, state["shifts"], shifts, cols, ds.tile_shape
+        ):
+            state["shifts"] = shifts
+            stitched_layer.refresh()
+            return
+        # otherwise compose afresh and swap the layer data
+        mosaic, lo, hi = compose_mosaic(tiles, shifts, rows, cols, ds.tile_shape)
+        state["shifts"], state["mosaic"] = shifts, mosaic
         # 4. update layer
         stitched_layer.data = mosaic
-        stitched_layer.contrast_limits = (mosaic.min(), mosaic.max())
-
-    # hook into pan/zoom events
-    viewer.camera.events.center.connect(update_stitch)
-    viewer.camera.events.zoom.connect(update_stitch)
+        stitched_layer.contrast_limits = (lo, hi)
+
+    # hook into pan/zoom events; a drag fires dozens of them, so they only
+    # (re)start a 50 ms single-shot timer and the last one restitches
+    debounce = QTimer()
+    debounce.setSingleShot(True)
+    debounce.setInterval(50)
+    debounce.timeout.connect(update_stitch)
+    viewer.camera.events.center.connect(lambda event: debounce.start())
+    viewer.camera.events.zoom.connect(lambda event: debounce.start())
 
     # initial stitch
     update_stitch()
@@ -85,3 +85,61 @@ def test_concurrent_access():
     # Both threads should get an array and load_tile was only called once
     assert len(results) == 2
     assert ds.calls.count((2, 0, 0)) == 1
+
+
+def test_coarse_level_derived_from_cached_full_res():
+    ds = DummyDataSource()
+    cache = TileCache(datasource=ds, max_bytes=1000)
+    full = np.arange(100, dtype=np.uint8).reshape(10, 10)
+    cache.put(0, 0, 1, full)
+
+    # level 2 of a resident level-1 tile is strided, not loaded
+    tile = cache.get(0, 0, 2)
+    assert ds.calls == []
+    np.testing.assert_array_equal(tile, full[::2, ::2])
+
+
+def test_prefetch_populates_cache():
+    ds = DummyDataSource()
+    cache = TileCache(datasource=ds, max_bytes=1000)
+
+    fut = cache.prefetch(3, 0, 1)
+    tile = fut.result(timeout=5)
+    assert tile.shape == (10, 10)
+    assert (3, 0, 1) in cache.cache
+
+    # a later get is a hit
+    ds.calls.clear()
+    cache.get(3, 0, 1)
+    assert ds.calls == []
+
+
+def test_hit_refreshes_recency():
+    ds = DummyDataSource()
+    cache = TileCache(datasource=ds, max_bytes=200)  # two 100-byte tiles
+
+    cache.get(0, 0, 0)
+    cache.get(1, 0, 0)
+    cache.get(0, 0, 0)  # hit: tile 0's reference bit is set
+    cache.get(2, 0, 0)  # tile 0 gets a second chance, tile 1 is evicted
+
+    assert (0, 0, 0) in cache.cache
+    assert (1, 0, 0) not in cache.cache
+    assert (2, 0, 0) in cache.cache
+
+
+def test_new_tile_survives_when_all_residents_are_referenced():
+    ds = DummyDataSource()
+    cache = TileCache(datasource=ds, max_bytes=200)  # two 100-byte tiles
+
+    cache.get(0, 0, 0)
+    cache.get(1, 0, 0)
+    cache.get(0, 0, 0)  # both residents referenced
+    cache.get(1, 0, 0)
+    cache.get(2, 0, 0)  # one of them goes, never the tile just loaded
+
+    assert (2, 0, 0) in cache.cache
+    assert len(cache.cache) == 2
+    ds.calls.clear()
+    cache.get(2, 0, 0)
+    assert ds.calls == []